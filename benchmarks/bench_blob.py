@@ -0,0 +1,111 @@
+"""Compare peak memory of inline base64 documents and `BlobRef`s.
+
+Sends `--requests` concurrent single-function calls, each with its own
+document of `--size-mb` megabytes, to the local mock server. Documents are
+sent once as base64 strings built by the caller and once as `BlobRef`s to
+files, and the peak traced Python allocation of each run is reported.
+
+    python -m benchmarks.bench_blob --requests 8 --size-mb 4
+"""
+import os
+import sys
+import json
+import base64
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from typing import Dict, List
+from claudetools.content.blob import BlobRef
+from claudetools.tools.tool import AsyncTool
+
+MODEL = "claude-3-haiku-20240307"
+TOOLS = [{
+    "name": "summarize",
+    "description": "Summarize a document.",
+    "parameters": {
+        "properties": {
+            "text": {
+                "type": "string"
+            }
+        },
+        "required": ["text"],
+        "type": "object"
+    }
+}]
+
+
+def inline_block(path: str) -> Dict:
+    with open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode("ascii")
+    return {
+        "type": "document",
+        "source": {
+            "type": "base64",
+            "media_type": "application/pdf",
+            "data": data
+        }
+    }
+
+
+async def send_all(base_url: str, paths: List[str], blobs: bool):
+    tool = AsyncTool(anthropic_api_key="benchmark", anthropic_base_url=base_url)
+    requests = [[{
+        "role": "user",
+        "content": [
+            BlobRef.from_path(path) if blobs else inline_block(path),
+            {"type": "text", "text": "Summarize this document."}
+        ]
+    }] for path in paths]
+    await asyncio.gather(*[
+        tool(MODEL, messages, TOOLS, max_tokens=100) for messages in requests
+    ])
+
+
+def peak_mb(base_url: str, paths: List[str], blobs: bool) -> float:
+    tracemalloc.start()
+    asyncio.run(send_all(base_url, paths, blobs))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 2**20, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.requests):
+            path = os.path.join(directory, f"doc{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(os.urandom(int(args.size_mb * 2**20)))
+            paths.append(path)
+        server = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.mock_server", "--port",
+            str(args.port), "--latency", "constant", "--latency-ms", "200"
+        ],
+                                  stdout=subprocess.PIPE,
+                                  text=True)
+        try:
+            # The server prints its address once it is listening
+            server.stdout.readline()
+            base_url = f"http://127.0.0.1:{args.port}"
+            report = {
+                "requests": args.requests,
+                "size_mb": args.size_mb,
+                "inline_peak_mb": peak_mb(base_url, paths, False),
+                "blob_peak_mb": peak_mb(base_url, paths, True)
+            }
+        finally:
+            server.terminate()
+            server.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
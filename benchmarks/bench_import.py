@@ -0,0 +1,83 @@
+"""Guard the cold-start cost of importing claudetools.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+reports the median cumulative import time. Exits non-zero if a module takes
+longer than `--max-ms` or pulls in a module that should only load on demand
+(backend clients, XML parsing, dotenv).
+
+    python -m benchmarks.bench_import --max-ms 400
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+MODULES = ["claudetools.tools.tool", "claudetools.agent.agent"]
+DEFERRED = ["anthropic", "boto3", "botocore", "xml.etree", "dotenv"]
+
+
+def import_time(module: str) -> Tuple[float, List[str]]:
+    """Cumulative import time of `module` in ms and every module it loaded."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             f"import {module}"],
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    total, loaded = 0.0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        loaded.append(name.strip())
+        if name.strip() == module:
+            total = int(cumulative) / 1000
+    return total, loaded
+
+
+def run(modules: List[str], repeat: int) -> Dict:
+    report = {}
+    for module in modules:
+        times, loaded = [], []
+        for _ in range(repeat):
+            elapsed, loaded = import_time(module)
+            times.append(elapsed)
+        report[module] = {
+            "median_ms": round(statistics.median(times), 1),
+            "modules": len(loaded),
+            "deferred_loaded": sorted({
+                name
+                for name in loaded for prefix in DEFERRED
+                if name == prefix or name.startswith(prefix + ".")
+            })
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-ms", type=float, default=400.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    report = run(args.modules, args.repeat)
+    print(json.dumps(report, indent=2))
+    failed = False
+    for module, result in report.items():
+        if result["median_ms"] > args.max_ms:
+            print(f"{module}: {result['median_ms']} ms exceeds {args.max_ms} ms",
+                  file=sys.stderr)
+            failed = True
+        if result["deferred_loaded"]:
+            print(f"{module} eagerly imports {result['deferred_loaded']}",
+                  file=sys.stderr)
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
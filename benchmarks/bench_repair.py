@@ -0,0 +1,94 @@
+"""Measure how many retries local parameter repair removes.
+
+Each line of the samples file holds a model `output` for the `createTask`
+function below. A sample counts as a retry when its call fails to decode or
+validate; the benchmark reports the retries with and without repair.
+
+    python -m benchmarks.bench_repair --samples benchmarks/repair_samples.jsonl
+"""
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List
+from claudetools.tools.tool import Tool
+from claudetools.extract.single import extractSingleFunction
+
+SAMPLES = Path(__file__).parent / "repair_samples.jsonl"
+
+TOOLS = [{
+    "name": "createTask",
+    "description": "Create a task.",
+    "parameters": {
+        "properties": {
+            "title": {
+                "type": "string"
+            },
+            "priority": {
+                "type": "integer"
+            },
+            "done": {
+                "type": "boolean"
+            },
+            "due": {
+                "anyOf": [{
+                    "type": "string"
+                }, {
+                    "type": "null"
+                }]
+            },
+            "status": {
+                "enum": ["open", "closed"],
+                "type": "string"
+            },
+            "tags": {
+                "type": "array",
+                "items": {
+                    "type": "string"
+                }
+            }
+        },
+        "required": ["title", "priority"],
+        "type": "object"
+    }
+}]
+
+
+def needs_retry(tool: Tool, output: str, repair: bool) -> bool:
+    if repair:
+        calls = extractSingleFunction(output)
+    else:
+        try:
+            calls = [json.loads(raw)
+                     for raw in extractSingleFunction(output, raw=True)]
+        except json.JSONDecodeError:
+            return True
+    if not calls:
+        return True
+    if repair:
+        tool._repair_parameters(calls[0], TOOLS)
+    return bool(tool._validate_parameters(calls[0], TOOLS))
+
+
+def run(samples: List[str]) -> Dict:
+    tool = Tool(anthropic_api_key="benchmark")
+    before = sum(needs_retry(tool, output, False) for output in samples)
+    after = sum(needs_retry(tool, output, True) for output in samples)
+    return {
+        "samples": len(samples),
+        "retries_without_repair": before,
+        "retries_with_repair": after,
+        "retries_avoided": before - after
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", default=str(SAMPLES))
+    args = parser.parse_args()
+    with open(args.samples) as f:
+        samples = [json.loads(line)["output"] for line in f if line.strip()]
+    print(json.dumps(run(samples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
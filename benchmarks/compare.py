@@ -0,0 +1,50 @@
+"""Compare two benchmark result files written by `benchmarks.run`.
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+import json
+import argparse
+from typing import Dict, Tuple
+
+KEY_FIELDS = ("name", "sample", "tool_count", "concurrency")
+METRICS = ("throughput", "p50_ms", "p95_ms", "p99_ms")
+
+
+def result_key(result: Dict) -> Tuple:
+    return tuple((field, result[field]) for field in KEY_FIELDS
+                 if field in result)
+
+
+def compare(baseline: Dict, candidate: Dict):
+    before = {result_key(r): r for r in baseline["results"]}
+    rows = []
+    for result in candidate["results"]:
+        key = result_key(result)
+        if key not in before:
+            continue
+        for metric in METRICS:
+            old, new = before[key][metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append((key, metric, old, new, change))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diff two claudetools benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"{baseline['version']} -> {candidate['version']}")
+    for key, metric, old, new, change in compare(baseline, candidate):
+        label = " ".join(f"{k}={v}" for k, v in key)
+        print(f"{label:<60} {metric:<10} {old:>12.3f} {new:>12.3f} "
+              f"{change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""Local mock of the Anthropic Messages API for offline benchmarks.
+
+Run standalone with `python -m benchmarks.mock_server --port 8765` or start it
+in-process with `MockServer(config).start()` and point a client at
+`server.base_url`.
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pydantic import BaseModel
+from typing import List, Union
+
+TOOL_NAME_PATTERN = re.compile(r"'name': '([^']+)'")
+
+
+class MockConfig(BaseModel):
+    # Latency distribution: constant, uniform, exponential or lognormal
+    latency: str = "lognormal"
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    # Canned response texts; generated from the tools in the prompt if empty
+    outputs: List[str] = []
+    stream_chunk_size: int = 16
+    seed: Union[int, None] = None
+
+
+class MockState:
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def sample_latency(self) -> float:
+        config = self.config
+        with self.lock:
+            if config.latency == "constant":
+                value = config.latency_ms
+            elif config.latency == "uniform":
+                value = self.random.uniform(0, 2 * config.latency_ms)
+            elif config.latency == "exponential":
+                value = self.random.expovariate(1 / config.latency_ms)
+            else:
+                value = config.latency_ms * self.random.lognormvariate(
+                    0, config.latency_sigma)
+        return value / 1000
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.random.random() < rate
+
+    def choose(self, items):
+        with self.lock:
+            return self.random.choice(items)
+
+
+def tool_call_output(system: str, state: MockState) -> str:
+    """Build a well-formed (or deliberately broken) function call response."""
+    names = TOOL_NAME_PATTERN.findall(system) or ["unknownFunction"]
+    multiple = "<multiplefunctions>" in system
+    count = 2 if multiple else 1
+    calls = "\n".join(
+        f'    <functioncall> {json.dumps({"name": state.choose(names), "parameters": {"text": "mock"}})} </functioncall>'
+        for _ in range(count))
+    tag = "multiplefunctions" if multiple else "singlefunction"
+    if state.roll(state.config.malformed_rate):
+        if state.roll(0.5):
+            # A missing closing tag means no function call is found at all
+            return f"Sure, here you go\n<{tag}>\n{calls}\n"
+        # An unescaped ampersand makes ElementTree fall back to the regex
+        return f"<{tag}>\n{calls}\n    Notes & caveats\n</{tag}>"
+    return f"<{tag}>\n{calls}\n</{tag}>"
+
+
+def message_body(model: str, text: str, input_tokens: int) -> dict:
+    return {
+        "id": f"msg_mock_{int(time.time() * 1e6)}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{
+            "type": "text",
+            "text": text
+        }],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": max(1, len(text) // 4)
+        }
+    }
+
+
+def make_handler(state: MockState):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/messages"):
+                return self.send_json(404, error_body("not_found_error",
+                                                      "Not found"))
+            length = int(self.headers.get("content-length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with state.lock:
+                state.requests += 1
+
+            time.sleep(state.sample_latency())
+
+            if state.roll(state.config.rate_limit_rate):
+                with state.lock:
+                    state.rate_limited += 1
+                return self.send_json(429,
+                                      error_body("rate_limit_error",
+                                                 "Mock rate limit"),
+                                      {"retry-after-ms": "10",
+                                       "retry-after": "0"})
+            if state.roll(state.config.error_rate):
+                with state.lock:
+                    state.errors += 1
+                return self.send_json(529,
+                                      error_body("overloaded_error",
+                                                 "Mock overloaded"))
+
+            system = request.get("system") or ""
+            if isinstance(system, list):
+                system = " ".join(block.get("text", "") for block in system)
+            if state.config.outputs:
+                text = state.choose(state.config.outputs)
+            else:
+                text = tool_call_output(system, state)
+            input_tokens = len(json.dumps(request)) // 4
+            body = message_body(request.get("model", "mock"), text,
+                                input_tokens)
+            if request.get("stream"):
+                return self.send_stream(body)
+            return self.send_json(200, body)
+
+        def send_json(self, status: int, body: dict, headers=None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def send_stream(self, body: dict):
+            text = body["content"][0]["text"]
+            size = state.config.stream_chunk_size
+            start = dict(body, content=[], stop_reason=None)
+            start["usage"] = dict(body["usage"], output_tokens=1)
+            events = [("message_start", {
+                "type": "message_start",
+                "message": start
+            }),
+                      ("content_block_start", {
+                          "type": "content_block_start",
+                          "index": 0,
+                          "content_block": {
+                              "type": "text",
+                              "text": ""
+                          }
+                      })]
+            for i in range(0, len(text), size):
+                events.append(("content_block_delta", {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {
+                        "type": "text_delta",
+                        "text": text[i:i + size]
+                    }
+                }))
+            events += [("content_block_stop", {
+                "type": "content_block_stop",
+                "index": 0
+            }),
+                       ("message_delta", {
+                           "type": "message_delta",
+                           "delta": {
+                               "stop_reason": "end_turn",
+                               "stop_sequence": None
+                           },
+                           "usage": {
+                               "output_tokens": body["usage"]["output_tokens"]
+                           }
+                       }), ("message_stop", {
+                           "type": "message_stop"
+                       })]
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("cache-control", "no-cache")
+            self.send_header("connection", "close")
+            self.end_headers()
+            for event, data in events:
+                self.wfile.write(
+                    f"event: {event}\ndata: {json.dumps(data)}\n\n".encode(
+                        "utf-8"))
+                self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def error_body(error_type: str, message: str) -> dict:
+    return {
+        "type": "error",
+        "error": {
+            "type": error_type,
+            "message": message
+        }
+    }
+
+
+class MockServer:
+
+    def __init__(self,
+                 config: Union[MockConfig, None] = None,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.state = MockState(config or MockConfig())
+        self.httpd = ThreadingHTTPServer((host, port),
+                                         make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mock Anthropic Messages API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency",
+                        default="lognormal",
+                        choices=["constant", "uniform", "exponential",
+                                 "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    config = MockConfig(latency=args.latency,
+                        latency_ms=args.latency_ms,
+                        latency_sigma=args.latency_sigma,
+                        error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate,
+                        malformed_rate=args.malformed_rate,
+                        seed=args.seed)
+    server = MockServer(config, args.host, args.port)
+    print(f"Mock Messages API listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
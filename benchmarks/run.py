@@ -0,0 +1,253 @@
+"""Offline benchmark suite for claudetools.
+
+Runs extraction, validation, `Tool` and `AsyncTool` against a local mock of the
+Messages API across tool-set sizes and concurrency levels and writes the
+results as JSON, so two versions can be compared with `benchmarks.compare`.
+
+    python -m benchmarks.run --output bench.json
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from typing import Callable, Dict, List
+from benchmarks.mock_server import MockConfig, MockServer
+from claudetools.tools.tool import Tool, AsyncTool
+from claudetools.extract.single import extractSingleFunction
+from claudetools.extract.multiple import extractMultipleFunctions
+
+MODEL = "claude-3-haiku-20240307"
+MESSAGES = [{"role": "user", "content": "Remember to buy milk."}]
+
+
+def make_tools(count: int) -> List[Dict]:
+    return [{
+        "name": f"tool{i}",
+        "description": f"Benchmark tool number {i}.",
+        "parameters": {
+            "properties": {
+                "text": {
+                    "title": "Text",
+                    "type": "string"
+                }
+            },
+            "required": ["text"],
+            "title": f"Tool{i}",
+            "type": "object"
+        }
+    } for i in range(count)]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: List[float], elapsed: float,
+              errors: int, **labels) -> Dict:
+    return {
+        "name": name,
+        **labels,
+        "n": len(latencies) + errors,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
+
+
+def bench_cpu(name: str, fn: Callable, iterations: int, **labels) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, latencies, time.perf_counter() - start, 0,
+                     **labels)
+
+
+def bench_extraction(iterations: int) -> List[Dict]:
+    call = '<functioncall> {"name": "tool0", "parameters": {"text": "mock"}} </functioncall>'
+    samples = {
+        "single": f"<singlefunction>\n{call}\n</singlefunction>",
+        "multiple": f"<multiplefunctions>\n{call * 8}\n</multiplefunctions>",
+        "malformed":
+        f"<multiplefunctions>\n{call * 8}\nNotes & caveats\n</multiplefunctions>"
+    }
+    return [
+        bench_cpu("extract_single",
+                  lambda: extractSingleFunction(samples["single"]),
+                  iterations,
+                  sample="single"),
+        bench_cpu("extract_multiple",
+                  lambda: extractMultipleFunctions(samples["multiple"]),
+                  iterations,
+                  sample="multiple"),
+        bench_cpu("extract_multiple",
+                  lambda: extractMultipleFunctions(samples["malformed"]),
+                  iterations,
+                  sample="malformed")
+    ]
+
+
+def bench_validation(iterations: int, tool_counts: List[int]) -> List[Dict]:
+    results = []
+    validator = AsyncTool(anthropic_api_key="benchmark")
+    for count in tool_counts:
+        tools = make_tools(count)
+        calls = [{
+            "name": f"tool{i % count}",
+            "parameters": {
+                "text": "mock"
+            }
+        } for i in range(8)]
+        results.append(
+            bench_cpu("validate_parameters",
+                      lambda: validator._validate_parameters(calls, tools),
+                      iterations,
+                      tool_count=count))
+    return results
+
+
+def bench_sync_tool(base_url: str, requests: int,
+                    tool_counts: List[int]) -> List[Dict]:
+    results = []
+    tool = Tool(anthropic_api_key="benchmark", anthropic_base_url=base_url)
+    for count in tool_counts:
+        tools = make_tools(count)
+        latencies, errors = [], 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            try:
+                tool(MODEL, MESSAGES, tools, max_tokens=256)
+                latencies.append(time.perf_counter() - t0)
+            except Exception:
+                errors += 1
+        results.append(
+            summarize("Tool",
+                      latencies,
+                      time.perf_counter() - start,
+                      errors,
+                      tool_count=count,
+                      concurrency=1))
+    return results
+
+
+async def bench_async_tool(base_url: str, requests: int,
+                           tool_counts: List[int],
+                           concurrency_levels: List[int]) -> List[Dict]:
+    results = []
+    tool = AsyncTool(anthropic_api_key="benchmark",
+                     anthropic_base_url=base_url)
+    for count in tool_counts:
+        tools = make_tools(count)
+        for concurrency in concurrency_levels:
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies, errors = [], 0
+
+            async def one():
+                nonlocal errors
+                async with semaphore:
+                    t0 = time.perf_counter()
+                    try:
+                        await tool(MODEL,
+                                   MESSAGES,
+                                   tools,
+                                   multiple_tools=True,
+                                   max_tokens=256)
+                        latencies.append(time.perf_counter() - t0)
+                    except Exception:
+                        errors += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*[one() for _ in range(requests)])
+            results.append(
+                summarize("AsyncTool",
+                          latencies,
+                          time.perf_counter() - start,
+                          errors,
+                          tool_count=count,
+                          concurrency=concurrency))
+    return results
+
+
+def package_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("claudetools")
+    except Exception:
+        return "dev"
+
+
+def run(args) -> Dict:
+    config = MockConfig(latency=args.latency,
+                        latency_ms=args.latency_ms,
+                        error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate,
+                        malformed_rate=args.malformed_rate,
+                        seed=args.seed)
+    results = bench_extraction(args.iterations)
+    results += bench_validation(args.iterations, args.tool_counts)
+    with MockServer(config) as server:
+        results += bench_sync_tool(server.base_url, args.requests,
+                                   args.tool_counts)
+        results += asyncio.run(
+            bench_async_tool(server.base_url, args.requests,
+                             args.tool_counts, args.concurrency))
+        server_stats = {
+            "requests": server.state.requests,
+            "errors": server.state.errors,
+            "rate_limited": server.state.rate_limited
+        }
+    return {
+        "version": package_version(),
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "mock": config.model_dump(),
+        "server": server_stats,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="claudetools benchmarks")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--tool-counts",
+                        type=int,
+                        nargs="+",
+                        default=[1, 10, 50])
+    parser.add_argument("--concurrency",
+                        type=int,
+                        nargs="+",
+                        default=[1, 8, 32])
+    parser.add_argument("--latency", default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # The library logs every request and retry; keep the timings clean
+
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S')
+# Importing the library must not configure logging for the application;
+# call `logging.basicConfig(level=logging.INFO)` to see claudetools' logs.
+logging.getLogger(__name__).addHandler(logging.NullHandler())
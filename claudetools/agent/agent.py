@@ -0,0 +1,253 @@
+import json
+import time
+import asyncio
+import logging
+from pydantic import BaseModel
+from typing import Any, Callable, List, Dict, Union, Literal
+from claudetools.tools.tool import AsyncTool, Messages, Functions
+from claudetools.extract.stream import FunctionCallStreamParser
+from claudetools.prompts.agent import AGENT_FUNCTION_CALLS
+from claudetools.cache.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResult(BaseModel):
+    index: int
+    name: Union[str, None]
+    parameters: Dict = {}
+    output: Any = None
+    error: Union[str, None] = None
+    duration: float = 0.0
+
+
+class AgentStep(BaseModel):
+    output: str
+    results: List[ToolResult]
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class AgentResult(BaseModel):
+    output: str
+    steps: List[AgentStep]
+    messages: List[Dict]
+    stop_reason: Literal["final", "max_steps", "token_budget"]
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+def format_results(results: List[ToolResult]) -> str:
+    """Render tool results as the compact `<functionresults>` feedback."""
+    lines = ["<functionresults>"]
+    for result in results:
+        payload = {
+            "error": result.error
+        } if result.error else result.output
+        lines.append(
+            f'<result index="{result.index}" name="{result.name}">'
+            f'{json.dumps(payload, separators=(",", ":"), default=str)}'
+            "</result>")
+    lines.append("</functionresults>")
+    return "\n".join(lines)
+
+
+class AsyncAgent:
+    """Multi-step agent loop on top of `AsyncTool`.
+
+    Every step calls the model, executes the function calls it makes and feeds
+    the results back as a user message until the model answers without calling
+    a function, `max_steps` is reached or the token budget is spent. In
+    streaming mode each `<functioncall>` is executed as soon as it is parsed,
+    overlapping tool execution with the rest of the generation.
+
+    `caches` opts individual tools into result memoization, mapping a tool
+    name to the `ResultCache` its handler results are kept in.
+    """
+
+    def __init__(self,
+                 tool: AsyncTool,
+                 handlers: Dict[str, Callable],
+                 max_steps: int = 8,
+                 token_budget: Union[int, None] = None,
+                 stream: bool = True,
+                 caches: Union[Dict[str, ResultCache], None] = None):
+        self.tool = tool
+        self.handlers = handlers
+        self.max_steps = max_steps
+        self.token_budget = token_budget
+        self.stream = stream
+        self.caches = caches or {}
+
+    async def run(self,
+                  model: str,
+                  messages: List[Dict],
+                  tools: List,
+                  attach_system: Union[None, str] = None,
+                  validate_params: bool = True,
+                  repair_params: bool = True,
+                  **kwargs) -> AgentResult:
+        Messages.model_validate({"messages": messages})
+        Functions.model_validate({"functions": tools})
+
+        system = AGENT_FUNCTION_CALLS.format(functions=tools)
+        if attach_system:
+            system += f"\n\nTask: {attach_system}"
+
+        messages = list(messages)
+        steps = []
+        input_tokens = output_tokens = 0
+        stop_reason = "max_steps"
+        output = ""
+
+        for step in range(self.max_steps):
+            logger.info(f"Agent step {step + 1} of {self.max_steps}")
+            if self.stream:
+                output, tasks, usage = await self._stream_step(
+                    model, messages, tools, system, validate_params,
+                    repair_params, **kwargs)
+            else:
+                output, tasks, usage = await self._complete_step(
+                    model, messages, tools, system, validate_params,
+                    repair_params, **kwargs)
+            try:
+                results = list(await asyncio.gather(*tasks))
+            except BaseException:
+                await self._cancel(tasks)
+                raise
+
+            step_input = getattr(usage, "input_tokens", 0) or 0
+            step_output = getattr(usage, "output_tokens", 0) or 0
+            input_tokens += step_input
+            output_tokens += step_output
+            steps.append(
+                AgentStep(output=output,
+                          results=results,
+                          input_tokens=step_input,
+                          output_tokens=step_output))
+
+            if not results:
+                stop_reason = "final"
+                break
+
+            messages.append({"role": "assistant", "content": output})
+            messages.append({
+                "role": "user",
+                "content": format_results(results)
+            })
+
+            if self.token_budget is not None and (
+                    input_tokens + output_tokens) >= self.token_budget:
+                logger.warning(
+                    f"Token budget of {self.token_budget} exhausted after step {step + 1}"
+                )
+                stop_reason = "token_budget"
+                break
+
+        return AgentResult(output=output,
+                           steps=steps,
+                           messages=messages,
+                           stop_reason=stop_reason,
+                           input_tokens=input_tokens,
+                           output_tokens=output_tokens)
+
+    async def _stream_step(self, model, messages, tools, system,
+                           validate_params, repair_params, **kwargs):
+        parser = FunctionCallStreamParser()
+        tasks = []
+        try:
+            async with self.tool.model_slot(model), self.tool.complete.stream(
+                    model, messages, system=system, **kwargs) as stream:
+                async for text in stream.text_stream:
+                    for call in parser.feed(text):
+                        # Start executing while the model keeps generating
+                        tasks.append(
+                            asyncio.ensure_future(
+                                self._execute(len(tasks), call, tools,
+                                              validate_params,
+                                              repair_params)))
+                message = await stream.get_final_message()
+        except BaseException:
+            await self._cancel(tasks)
+            raise
+        return parser.text, tasks, message.usage
+
+    @staticmethod
+    async def _cancel(tasks: List[asyncio.Future]):
+        """Don't leave calls of a failed step running in the background."""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _complete_step(self, model, messages, tools, system,
+                             validate_params, repair_params, **kwargs):
+        async with self.tool.model_slot(model):
+            response = await self.tool.complete.create(model,
+                                                       messages,
+                                                       system=system,
+                                                       **kwargs)
+        output = response.content[0].text
+        calls = FunctionCallStreamParser().feed(output)
+        tasks = [
+            asyncio.ensure_future(
+                self._execute(index, call, tools, validate_params,
+                              repair_params))
+            for index, call in enumerate(calls)
+        ]
+        return output, tasks, response.usage
+
+    async def _execute(self, index: int, call: Dict, tools: List,
+                       validate_params: bool,
+                       repair_params: bool = True) -> ToolResult:
+        if not (isinstance(call, dict) and isinstance(call.get("name"), str)
+                and isinstance(call.get("parameters") or {}, dict)):
+            return ToolResult(
+                index=index,
+                name=None,
+                error=
+                f"Malformed function call: {json.dumps(call, default=str)}")
+        if repair_params:
+            self.tool._repair_parameters(call, tools)
+        name = call.get("name")
+        parameters = call.get("parameters") or {}
+        result = ToolResult(index=index, name=name, parameters=parameters)
+
+        handler = self.handlers.get(name)
+        if handler is None:
+            result.error = f"Unknown function: {name}"
+            return result
+        if validate_params:
+            validation_errors = self.tool._validate_parameters(call, tools)
+            if validation_errors:
+                result.error = "; ".join(validation_errors)
+                return result
+
+        start = time.perf_counter()
+        try:
+            cache = self.caches.get(name)
+            if cache is not None:
+                schema = next((t for t in tools if t['name'] == name), None)
+                result.output = await cache.call(
+                    name, parameters,
+                    lambda: self._invoke(handler, parameters), schema)
+            else:
+                result.output = await self._invoke(handler, parameters)
+        except Exception as err:
+            logger.exception(f"Function '{name}' raised an error")
+            result.error = f"{type(err).__name__}: {err}"
+        result.duration = time.perf_counter() - start
+        return result
+
+    async def _invoke(self, handler: Callable, parameters: Dict):
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(**parameters)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None,
+                                          lambda: handler(**parameters))
+
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hit-rate metrics of every cached tool."""
+        return {
+            name: cache.stats.to_dict()
+            for name, cache in self.caches.items()
+        }
@@ -0,0 +1,203 @@
+import copy
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple, Union
+from claudetools.utils.canonical import canonical_hash
+from claudetools.concurrency.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheStats:
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate
+        }
+
+
+class ResultCache:
+    """Memoize a tool handler's results keyed on its canonical arguments.
+
+    Entries live in an in-memory LRU with an optional TTL. When `sqlite_path`
+    is given, results are also written to a SQLite table that several
+    processes can share. Concurrent identical calls run the handler once.
+    Only cache handlers that are read-only: the result is reused for any call
+    with the same name and parameters. Every caller gets its own copy of the
+    result, and only results that round-trip through JSON are persisted.
+    `call` runs SQLite reads and writes in the default executor; `get` and
+    `set` are blocking.
+    """
+
+    def __init__(self,
+                 max_size: int = 1024,
+                 ttl: Union[float, None] = None,
+                 sqlite_path: Union[str, None] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.stats = CacheStats()
+        self.flight = SingleFlight()
+        self.sqlite_path = sqlite_path
+        self._db = None
+        self._db_lock = threading.Lock()
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS tool_results "
+                             "(key TEXT PRIMARY KEY, value TEXT, "
+                             "expires REAL)")
+            self._db.commit()
+
+    def key(self,
+            name: str,
+            parameters: Dict,
+            schema: Union[Dict, None] = None) -> str:
+        """Hash the call after filling in schema defaults for missing params."""
+        parameters = dict(parameters or {})
+        if schema:
+            properties = schema.get("parameters", {}).get("properties", {})
+            for param_name, param_schema in properties.items():
+                if param_name not in parameters and "default" in param_schema:
+                    parameters[param_name] = param_schema["default"]
+        return canonical_hash({"name": name, "parameters": parameters})
+
+    def get(self, key: str):
+        """Return a copy of the cached result (blocks on SQLite reads)."""
+        value = self._lookup(key)
+        if value is _MISSING and self._db is not None:
+            value = self._remember_row(key, self._load(key))
+        return value if value is _MISSING else copy.deepcopy(value)
+
+    def set(self, key: str, value: Any):
+        """Cache `value` (blocks on SQLite writes)."""
+        expires = self._remember_result(key, value)
+        if self._db is not None:
+            self._persist(key, value, expires)
+
+    def _lookup(self, key: str):
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires is None or expires > time.time():
+                self.entries.move_to_end(key)
+                return value
+            del self.entries[key]
+        return _MISSING
+
+    def _load(self, key: str) -> Union[Tuple[Any, Union[float, None]], None]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires FROM tool_results WHERE key = ?",
+                (key, )).fetchone()
+        if row and (row[1] is None or row[1] > time.time()):
+            return json.loads(row[0]), row[1]
+        return None
+
+    def _remember_row(self, key: str, row):
+        if row is None:
+            return _MISSING
+        self._remember(key, *row)
+        return row[0]
+
+    def _remember_result(self, key: str, value: Any) -> Union[float, None]:
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        self._remember(key, copy.deepcopy(value), expires)
+        return expires
+
+    def _persist(self, key: str, value: Any, expires: Union[float, None]):
+        serialized = self._serialize(value)
+        if serialized is None:
+            logger.warning(
+                "Result is not JSON serializable, caching it in memory only")
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_results VALUES (?, ?, ?)",
+                (key, serialized, expires))
+            self._db.commit()
+
+    @staticmethod
+    def _serialize(value: Any) -> Union[str, None]:
+        """JSON for `value`, or None if it wouldn't load back unchanged."""
+        try:
+            serialized = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+        # Tuples come back as lists, non-string keys as strings
+        if json.loads(serialized) != value:
+            return None
+        return serialized
+
+    def _remember(self, key: str, value: Any, expires: Union[float, None]):
+        self.entries[key] = (value, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def call(self,
+                   name: str,
+                   parameters: Dict,
+                   handler: Callable[[], Awaitable[Any]],
+                   schema: Union[Dict, None] = None):
+        """Return the cached result or run `handler` once for this call."""
+        key = self.key(name, parameters, schema)
+        loop = asyncio.get_running_loop()
+        value = self._lookup(key)
+        if value is _MISSING and self._db is not None:
+            # SQLite reads and commits run off the event loop
+            value = self._remember_row(
+                key, await loop.run_in_executor(None, self._load, key))
+        if value is not _MISSING:
+            self.stats.hits += 1
+            logger.info(f"Result cache hit for '{name}'")
+            return copy.deepcopy(value)
+
+        if key in self.flight.flights:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+
+        async def run():
+            value = await handler()
+            expires = self._remember_result(key, value)
+            if self._db is not None:
+                await loop.run_in_executor(None, self._persist, key, value,
+                                           expires)
+            return value
+
+        return copy.deepcopy(await self.flight.do(key, run))
+
+    def clear(self):
+        self.entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM tool_results")
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
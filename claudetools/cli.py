@@ -0,0 +1,214 @@
+"""`claudetools` command line interface for bulk function calling.
+
+Reads conversations from a JSONL file, one object per line:
+
+    {"id": "42", "messages": [{"role": "user", "content": "..."}]}
+
+and runs them through `AsyncTool.tool_call` with bounded concurrency. Every
+result is appended to the output JSONL as soon as it is available and the ids
+of completed conversations are appended to a checkpoint file, so an
+interrupted run can be resumed with the same command. Delivery is
+at-least-once: a crash between writing a result and checkpointing it repeats
+that conversation on resume.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Dict, Iterator, List, Set, Tuple, Union
+from claudetools.tools.tool import AsyncTool
+
+logger = logging.getLogger(__name__)
+
+
+def read_conversations(path: str) -> Iterator[Tuple[str, Union[Dict, None]]]:
+    """Yield `(id, record)` pairs without loading the whole file.
+
+    Lines that aren't JSON objects are logged and yielded with a None record.
+    """
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as err:
+                logger.warning(f"Line {line_number} is not valid JSON: {err}")
+                record = None
+            if not isinstance(record, dict):
+                yield str(line_number), None
+                continue
+            yield str(record.get("id", line_number)), record
+
+
+def count_conversations(path: str) -> int:
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+def read_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+class Progress:
+
+    def __init__(self, total: Union[int, None], skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.start = time.monotonic()
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self.start
+        rate = self.done / elapsed if elapsed else 0.0
+        text = f"done {self.done} failed {self.failed} skipped {self.skipped}"
+        if self.total is not None:
+            remaining = max(
+                self.total - self.skipped - self.done - self.failed, 0)
+            eta = remaining / rate if rate else float("inf")
+            text += f" / {self.total} | {rate:.2f} it/s | ETA {eta:.0f}s"
+        else:
+            text += f" | {rate:.2f} it/s"
+        return text
+
+
+async def report(progress: Progress, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        sys.stderr.write(progress.line() + "\n")
+        sys.stderr.flush()
+
+
+async def process(args, tool: AsyncTool, tools: List[Dict]) -> Progress:
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    completed = read_checkpoint(checkpoint_path)
+    total = None if args.no_count else count_conversations(args.input)
+    progress = Progress(total, 0)
+
+    queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    output_file = open(args.output, "a")
+    checkpoint_file = open(checkpoint_path, "a")
+
+    def write(record: Dict, conversation_id: Union[str, None]):
+        output_file.write(json.dumps(record, default=str) + "\n")
+        output_file.flush()
+        if conversation_id is not None:
+            checkpoint_file.write(conversation_id + "\n")
+            checkpoint_file.flush()
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            conversation_id, record = item
+            try:
+                output = await tool.tool_call(
+                    args.model,
+                    record["messages"],
+                    tools,
+                    tool_choice=record.get("tool_choice"),
+                    multiple_tools=args.multiple_tools,
+                    attach_system=record.get("attach_system",
+                                             args.attach_system),
+                    max_retries=args.max_retries,
+                    max_tokens=args.max_tokens)
+                write({"id": conversation_id, "output": output},
+                      conversation_id)
+                progress.done += 1
+            except Exception as err:
+                logger.warning(f"Conversation {conversation_id} failed: {err}")
+                write({"id": conversation_id, "error": str(err)}, None)
+                progress.failed += 1
+
+    workers = [
+        asyncio.ensure_future(worker()) for _ in range(args.concurrency)
+    ]
+    reporter = asyncio.ensure_future(report(progress, args.progress_interval))
+    try:
+        for conversation_id, record in read_conversations(args.input):
+            if conversation_id in completed:
+                progress.skipped += 1
+                continue
+            if record is None:
+                write({"id": conversation_id, "error": "Malformed input line"},
+                      None)
+                progress.failed += 1
+                continue
+            await queue.put((conversation_id, record))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        reporter.cancel()
+        for task in workers:
+            task.cancel()
+        output_file.close()
+        checkpoint_file.close()
+    sys.stderr.write(progress.line() + "\n")
+    return progress
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="claudetools",
+        description="Run function calling over conversations in a JSONL file."
+    )
+    parser.add_argument("input", help="JSONL file with one conversation per line")
+    parser.add_argument("--tools",
+                        required=True,
+                        help="JSON file with the list of function schemas")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--output",
+                        required=True,
+                        help="JSONL file the results are appended to")
+    parser.add_argument("--checkpoint",
+                        default=None,
+                        help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--multiple-tools", action="store_true")
+    parser.add_argument("--attach-system", default=None)
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    parser.add_argument("--no-count",
+                        action="store_true",
+                        help="Skip counting the input (no ETA)")
+    parser.add_argument("--anthropic-api-key",
+                        default=os.environ.get("ANTHROPIC_API_KEY"))
+    parser.add_argument("--anthropic-base-url", default=None)
+    parser.add_argument("--aws-access-key", default=None)
+    parser.add_argument("--aws-secret-key", default=None)
+    parser.add_argument("--aws-session-token", default=None)
+    parser.add_argument("--aws-region", default=None)
+    parser.add_argument("--verbose", action="store_true")
+    return parser
+
+
+def main(argv: Union[List[str], None] = None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S')
+    with open(args.tools) as f:
+        tools = json.load(f)
+    tool = AsyncTool(anthropic_api_key=args.anthropic_api_key,
+                     aws_access_key=args.aws_access_key,
+                     aws_secret_key=args.aws_secret_key,
+                     aws_region=args.aws_region,
+                     aws_session_token=args.aws_session_token,
+                     anthropic_base_url=args.anthropic_base_url)
+    progress = asyncio.run(process(args, tool, tools))
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
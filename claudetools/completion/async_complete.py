@@ -1,8 +1,11 @@
 import os
 import json
+import time
+import asyncio
 import logging
 from typing import List, Dict, Union
-from anthropic import AsyncAnthropic, AsyncAnthropicBedrock
+from claudetools.completion.replay import RecordReplay, RecordingStream, ReplayStream
+from claudetools.content.blob import materialize, redact
 
 logger = logging.getLogger(__name__)
 
@@ -43,25 +46,78 @@ class AsyncComplete:
                  aws_access_key: Union[str, None] = None,
                  aws_secret_key: Union[str, None] = None,
                  aws_region: Union[str, None] = None,
-                 aws_session_token: Union[str, None] = None):
-        if anthropic_api_key:
-            self.client = AsyncAnthropic(api_key=anthropic_api_key)
+                 aws_session_token: Union[str, None] = None,
+                 anthropic_base_url: Union[str, None] = None,
+                 record_replay: Union[RecordReplay, None] = None,
+                 http_client=None):
+        self.record_replay = record_replay
+        if record_replay is not None and record_replay.mode == "replay":
+            # Responses come from the recording, no client is needed
+            self.client = None
+        elif anthropic_api_key:
+            # Clients are imported on construction to keep `import` cheap
+            from anthropic import AsyncAnthropic
+            self.client = AsyncAnthropic(api_key=anthropic_api_key,
+                                         base_url=anthropic_base_url,
+                                         http_client=http_client)
         else:
+            from anthropic import AsyncAnthropicBedrock
             if aws_session_token:
                 self.client = AsyncAnthropicBedrock(
-                    aws_session_token=aws_session_token, aws_region=aws_region)
+                    aws_session_token=aws_session_token,
+                    aws_region=aws_region,
+                    http_client=http_client)
             else:
                 self.client = AsyncAnthropicBedrock(
                     aws_access_key=aws_access_key,
                     aws_secret_key=aws_secret_key,
-                    aws_region=aws_region)
+                    aws_region=aws_region,
+                    http_client=http_client)
+
+    async def create(self, model: str, messages: List[Dict], **kwargs):
+        """Return the full Messages API response, including usage."""
+        logger.info(f"MODEL: {model}")
+        logger.info(
+            f"KWARGS: {json.dumps(redact(kwargs), indent=4) if kwargs else 'NONE'}"
+        )
+        if self.record_replay is not None:
+            return await self._record_replay(model, messages, **kwargs)
+        response = await self.client.messages.create(
+            model=model, messages=materialize(messages), **kwargs)
+        logger.info(f"RESPONSE: {redact(str(response))}")
+        return response
+
+    async def _record_replay(self, model: str, messages: List[Dict],
+                             **kwargs):
+        key = self.record_replay.key(model, messages, **kwargs)
+        if self.record_replay.mode == "replay":
+            response = self.record_replay.lookup(key)
+            await asyncio.sleep(self.record_replay.delay(response))
+            return response
+        start = time.perf_counter()
+        response = await self.client.messages.create(
+            model=model, messages=materialize(messages), **kwargs)
+        self.record_replay.record(key, response, time.perf_counter() - start)
+        logger.info(f"RESPONSE: {redact(str(response))}")
+        return response
+
+    def stream(self, model: str, messages: List[Dict], **kwargs):
+        """Return an async context manager streaming the response text."""
+        logger.info(f"MODEL (STREAM): {model}")
+        if self.record_replay is not None:
+            key = self.record_replay.key(model, messages, **kwargs)
+            if self.record_replay.mode == "replay":
+                message = self.record_replay.lookup(key)
+                return ReplayStream(message, self.record_replay.delay(message))
+            return RecordingStream(
+                self.record_replay, key,
+                self.client.messages.stream(model=model,
+                                            messages=materialize(messages),
+                                            **kwargs))
+        return self.client.messages.stream(model=model,
+                                           messages=materialize(messages),
+                                           **kwargs)
 
     async def __call__(self, model: str, messages: List[Dict], **kwargs):
-        logging.info(f"MODEL: {model}")
-        logging.info(
-            f"KWARGS: {json.dumps(kwargs, indent=4) if kwargs else 'NONE'}")
-        response = await self.client.messages.create(model=model,
-                                                     messages=messages,
-                                                     **kwargs)
-        logging.info(f"RESPONSE: {response}")
+        response = await self.create(model, messages, **kwargs)
         return response.content[0].text
@@ -1,7 +1,9 @@
 import json
+import time
 import logging
-from anthropic import Anthropic, AnthropicBedrock
 from typing import List, Dict, Union
+from claudetools.completion.replay import RecordReplay
+from claudetools.content.blob import materialize, redact
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +15,20 @@ class Complete:
                  aws_access_key: Union[str, None] = None,
                  aws_secret_key: Union[str, None] = None,
                  aws_region: Union[str, None] = None,
-                 aws_session_token: Union[str, None] = None):
-        if anthropic_api_key:
-            self.client = Anthropic(api_key=anthropic_api_key)
+                 aws_session_token: Union[str, None] = None,
+                 anthropic_base_url: Union[str, None] = None,
+                 record_replay: Union[RecordReplay, None] = None):
+        self.record_replay = record_replay
+        if record_replay is not None and record_replay.mode == "replay":
+            # Responses come from the recording, no client is needed
+            self.client = None
+        elif anthropic_api_key:
+            # Clients are imported on construction to keep `import` cheap
+            from anthropic import Anthropic
+            self.client = Anthropic(api_key=anthropic_api_key,
+                                    base_url=anthropic_base_url)
         else:
-
+            from anthropic import AnthropicBedrock
             if aws_session_token:
                 self.client = AnthropicBedrock(
                     aws_session_token=aws_session_token, aws_region=aws_region)
@@ -26,13 +37,33 @@ class Complete:
                                                aws_secret_key=aws_secret_key,
                                                aws_region=aws_region)
 
-    def __call__(self, model: str, messages: List[Dict], **kwargs):
-        logging.info(f"MODEL: {model}")
-        logging.info(
-            f"KWARGS: {json.dumps(kwargs, indent=4) if kwargs else 'NONE'}")
-        output = self.client.messages.create(model=model,
-                                             messages=messages,
-                                             **kwargs)
-        logging.info(f"RESPONSE: {output}")
+    def create(self, model: str, messages: List[Dict], **kwargs):
+        """Return the full Messages API response, including usage."""
+        logger.info(f"MODEL: {model}")
+        logger.info(
+            f"KWARGS: {json.dumps(redact(kwargs), indent=4) if kwargs else 'NONE'}"
+        )
+        if self.record_replay is not None:
+            return self._record_replay(model, messages, **kwargs)
+        output = self.client.messages.create(
+            model=model, messages=materialize(messages), **kwargs)
+        logger.info(f"RESPONSE: {redact(str(output))}")
         # print("MODEL OUTPUT\n", output)
+        return output
+
+    def _record_replay(self, model: str, messages: List[Dict], **kwargs):
+        key = self.record_replay.key(model, messages, **kwargs)
+        if self.record_replay.mode == "replay":
+            output = self.record_replay.lookup(key)
+            time.sleep(self.record_replay.delay(output))
+            return output
+        start = time.perf_counter()
+        output = self.client.messages.create(
+            model=model, messages=materialize(messages), **kwargs)
+        self.record_replay.record(key, output, time.perf_counter() - start)
+        logger.info(f"RESPONSE: {redact(str(output))}")
+        return output
+
+    def __call__(self, model: str, messages: List[Dict], **kwargs):
+        output = self.create(model, messages, **kwargs)
         return output.content[0].text
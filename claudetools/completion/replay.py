@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from pydantic import BaseModel
+from typing import Dict, List, Literal, Union
+from claudetools.utils.canonical import canonical_hash
+
+logger = logging.getLogger(__name__)
+
+
+class TextBlock(BaseModel):
+    type: str = "text"
+    text: str
+
+
+class Usage(BaseModel):
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class ReplayedMessage(BaseModel):
+    """Stand-in for the SDK `Message` served from a recording."""
+    content: List[TextBlock]
+    usage: Usage
+    stop_reason: Union[str, None] = None
+    latency: float = 0.0
+
+
+class RecordReplay:
+    """Record model responses to an append-only file and serve them back.
+
+    Requests are keyed on a hash of the model, messages and call kwargs. Each
+    line of the file holds one compact record: the key, the response text,
+    token usage, stop reason and the observed latency. In `replay` mode
+    identical requests are served in the order they were recorded, cycling
+    when the recording runs out. With `replay_latency` the recorded latency is
+    slept, divided by `speed` (e.g. `speed=10` replays at 10x).
+    """
+
+    def __init__(self,
+                 path: str,
+                 mode: Literal["record", "replay"] = "replay",
+                 replay_latency: bool = False,
+                 speed: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.speed = speed
+        self.records: Dict[str, List[Dict]] = {}
+        self.cursors: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise ValueError(f"Recording not found: {self.path}")
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.records.setdefault(record["k"], []).append(record)
+        logger.info(
+            f"Loaded {sum(len(r) for r in self.records.values())} recorded responses"
+        )
+
+    @staticmethod
+    def key(model: str, messages: List[Dict], **kwargs) -> str:
+        return canonical_hash({
+            "model": model,
+            "messages": messages,
+            **kwargs
+        })
+
+    def lookup(self, key: str) -> ReplayedMessage:
+        with self.lock:
+            records = self.records.get(key)
+            if not records:
+                raise ValueError(f"No recorded response for request {key}")
+            index = self.cursors.get(key, 0)
+            self.cursors[key] = index + 1
+            record = records[index % len(records)]
+        return ReplayedMessage(content=[TextBlock(text=record["t"])],
+                               usage=Usage(input_tokens=record["u"][0],
+                                           output_tokens=record["u"][1]),
+                               stop_reason=record.get("s"),
+                               latency=record.get("l", 0.0))
+
+    def delay(self, message: ReplayedMessage) -> float:
+        """Seconds to wait before serving a replayed response."""
+        if not self.replay_latency or self.speed <= 0:
+            return 0.0
+        return message.latency / self.speed
+
+    def record(self, key: str, response, latency: float):
+        usage = getattr(response, "usage", None)
+        record = {
+            "k": key,
+            "t": response.content[0].text,
+            "u": [
+                getattr(usage, "input_tokens", 0) or 0,
+                getattr(usage, "output_tokens", 0) or 0
+            ],
+            "s": getattr(response, "stop_reason", None),
+            "l": round(latency, 4)
+        }
+        line = json.dumps(record, separators=(",", ":"),
+                          ensure_ascii=False) + "\n"
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+class ReplayStream:
+    """Async stand-in for `messages.stream` serving a recorded response."""
+
+    def __init__(self,
+                 message: ReplayedMessage,
+                 delay: float = 0.0,
+                 chunk_size: int = 16):
+        self.message = message
+        self.delay = delay
+        self.chunk_size = chunk_size
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    @property
+    async def text_stream(self):
+        text = self.message.content[0].text
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+    async def get_final_message(self) -> ReplayedMessage:
+        return self.message
+
+
+class RecordingStream:
+    """Wrap a live `messages.stream` and record its final message."""
+
+    def __init__(self, record_replay: RecordReplay, key: str, stream):
+        self.record_replay = record_replay
+        self.key = key
+        self.stream = stream
+        self.live = None
+        self.start = 0.0
+
+    async def __aenter__(self):
+        self.start = time.perf_counter()
+        self.live = await self.stream.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            message = await self.live.get_final_message()
+            self.record_replay.record(self.key, message,
+                                      time.perf_counter() - self.start)
+        return await self.stream.__aexit__(exc_type, exc, traceback)
+
+    @property
+    def text_stream(self):
+        return self.live.text_stream
+
+    async def get_final_message(self):
+        return await self.live.get_final_message()
@@ -0,0 +1,165 @@
+import time
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Dict, Hashable, Union
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS_CODES = (429, 503, 529)
+THROTTLE_ERRORS = ("RateLimitError", "OverloadedError")
+
+
+def is_throttle(err: BaseException) -> bool:
+    """True for rate-limit and overloaded errors from the Anthropic clients."""
+    return (getattr(err, "status_code", None) in THROTTLE_STATUS_CODES
+            or type(err).__name__ in THROTTLE_ERRORS)
+
+
+class _LimitState:
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.latency = None
+        self.last_decrease = 0.0
+        self.throttles = 0
+        self.spikes = 0
+        self.successes = 0
+        self.condition = asyncio.Condition()
+
+
+class _Slot:
+
+    def __init__(self, limiter: "AdaptiveLimiter", key: Hashable):
+        self.limiter = limiter
+        self.key = key
+        self.start = 0.0
+        self.throttles = 0
+        self.token = None
+
+    async def __aenter__(self):
+        state = self.limiter.state(self.key)
+        async with state.condition:
+            while state.in_flight >= int(state.limit):
+                await state.condition.wait()
+            state.in_flight += 1
+        self.start = time.monotonic()
+        self.token = _current_slot.set(self)
+        return self
+
+    def throttled(self):
+        self.throttles += 1
+        self.limiter._on_throttle(self.limiter.state(self.key), self.start)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        _current_slot.reset(self.token)
+        latency = time.monotonic() - self.start
+        state = self.limiter.state(self.key)
+        if self.throttles:
+            # Already reported; the latency includes retry waits
+            pass
+        elif exc is None:
+            self.limiter._on_success(state, latency, self.start)
+        elif is_throttle(exc):
+            self.limiter._on_throttle(state, self.start)
+        async with state.condition:
+            state.in_flight -= 1
+            state.condition.notify_all()
+        return False
+
+
+_current_slot: ContextVar[Union[_Slot, None]] = ContextVar("limiter_slot",
+                                                             default=None)
+
+
+async def report_response(response):
+    """httpx response hook reporting throttled responses to the held slot.
+
+    The Anthropic clients retry 429 and 529 responses internally, so without
+    it the limiter would only see throttles that outlast every retry.
+    """
+    slot = _current_slot.get()
+    if slot is not None and response.status_code in THROTTLE_STATUS_CODES:
+        slot.throttled()
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with separate state per key.
+
+    The number of requests allowed in flight grows by `increase` for every
+    window of `limit` healthy responses and is multiplied by `decrease` when a
+    request is throttled (429/overloaded) or its latency exceeds
+    `latency_tolerance` times the smoothed latency. Only requests started
+    after the previous decrease can trigger another one, so a burst of
+    failures from one overloaded window backs off once.
+    """
+
+    def __init__(self,
+                 initial_limit: float = 4,
+                 min_limit: float = 1,
+                 max_limit: float = 256,
+                 increase: float = 1.0,
+                 decrease: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 smoothing: float = 0.1):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.states: Dict[Hashable, _LimitState] = {}
+
+    def state(self, key: Hashable) -> _LimitState:
+        if key not in self.states:
+            self.states[key] = _LimitState(self.initial_limit)
+        return self.states[key]
+
+    def slot(self, key: Hashable) -> _Slot:
+        """Async context manager holding one in-flight slot for `key`."""
+        return _Slot(self, key)
+
+    def limit(self, key: Hashable) -> float:
+        return self.state(key).limit
+
+    def _on_success(self, state: _LimitState, latency: float, start: float):
+        spike = (state.latency is not None
+                 and latency > self.latency_tolerance * state.latency)
+        # Spikes are smoothed in too so a lasting shift becomes the baseline
+        state.latency = latency if state.latency is None else (
+            (1 - self.smoothing) * state.latency + self.smoothing * latency)
+        if spike:
+            state.spikes += 1
+            self._backoff(state, start, "latency spike")
+            return
+        state.successes += 1
+        state.limit = min(self.max_limit,
+                          state.limit + self.increase / state.limit)
+
+    def _on_throttle(self, state: _LimitState, start: float):
+        state.throttles += 1
+        self._backoff(state, start, "throttled")
+
+    def _backoff(self, state: _LimitState, start: float, reason: str):
+        if start < state.last_decrease:
+            return
+        state.limit = max(self.min_limit, state.limit * self.decrease)
+        state.last_decrease = time.monotonic()
+        logger.info(
+            f"Concurrency limit lowered to {state.limit:.2f} ({reason})")
+
+    def metrics(self) -> Dict[str, Dict[str, Union[float, int, None]]]:
+        """Current limit and counters for every key."""
+        return {
+            str(key): {
+                "limit": state.limit,
+                "in_flight": state.in_flight,
+                "latency": state.latency,
+                "successes": state.successes,
+                "throttles": state.throttles,
+                "latency_spikes": state.spikes
+            }
+            for key, state in self.states.items()
+        }
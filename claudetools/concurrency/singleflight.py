@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run one coroutine per key and share its result with concurrent callers.
+
+    The shared call runs in its own task. A caller that is cancelled only stops
+    waiting; the shared call is cancelled once no caller is waiting on it.
+    """
+
+    def __init__(self):
+        self.flights: Dict[Hashable, _Flight] = {}
+        self.saved = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self.flights[key] = flight
+            flight.task.add_done_callback(
+                lambda _: self._forget(key, flight))
+        else:
+            self.saved += 1
+            logger.info(f"Coalesced in-flight call for key {key}")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting anymore; later callers start a new flight
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    def in_flight(self) -> int:
+        return len(self.flights)
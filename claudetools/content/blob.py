@@ -0,0 +1,150 @@
+import mmap
+import base64
+import hashlib
+import mimetypes
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Union
+
+# A multiple of 3 bytes, so chunks encode to base64 without padding
+CHUNK_SIZE = 3 * 256 * 1024
+LOG_LIMIT = 1000
+
+
+class BlobRef:
+    """Reference to an image or document for a message content list.
+
+    The bytes stay in the file (read through `mmap`) or in the buffer they were
+    given; nothing is base64-encoded until the request is sent. The SHA-256 of
+    the content is computed once and stands in for the data in logs and in
+    request keys, so record/replay and coalescing work on the content hash.
+
+        {"role": "user", "content": [BlobRef.from_path("report.pdf"),
+                                     {"type": "text", "text": "Summarize"}]}
+    """
+
+    def __init__(self,
+                 path: Union[str, None] = None,
+                 data: Union[bytes, bytearray, memoryview, None] = None,
+                 media_type: Union[str, None] = None):
+        if (path is None) == (data is None):
+            raise ValueError("BlobRef needs exactly one of `path` or `data`")
+        if media_type is None and path is not None:
+            media_type, _ = mimetypes.guess_type(path)
+        if not media_type:
+            raise ValueError("Could not guess the media type of the blob")
+        self.path = path
+        self.data = data
+        self.media_type = media_type
+        self._sha256 = None
+
+    @classmethod
+    def from_path(cls, path: str, media_type: Union[str, None] = None):
+        return cls(path=path, media_type=media_type)
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray, memoryview],
+                   media_type: str):
+        return cls(data=data, media_type=media_type)
+
+    @property
+    def kind(self) -> str:
+        return "image" if self.media_type.startswith("image/") else "document"
+
+    @contextmanager
+    def buffer(self) -> Iterator[memoryview]:
+        """The raw bytes, memory-mapped when the blob is a file."""
+        if self.data is not None:
+            yield memoryview(self.data)
+            return
+        with open(self.path, "rb") as f:
+            if not f.seek(0, 2):
+                yield memoryview(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    @property
+    def size(self) -> int:
+        with self.buffer() as view:
+            return view.nbytes
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            with self.buffer() as view:
+                for start in range(0, view.nbytes, CHUNK_SIZE):
+                    digest.update(view[start:start + CHUNK_SIZE])
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def iter_base64(self, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """Yield the base64 encoding piece by piece."""
+        if chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3")
+        with self.buffer() as view:
+            for start in range(0, view.nbytes, chunk_size):
+                yield base64.b64encode(view[start:start +
+                                            chunk_size]).decode("ascii")
+
+    def block(self) -> Dict:
+        """The Messages API content block, encoded now and not kept."""
+        return {
+            "type": self.kind,
+            "source": {
+                "type": "base64",
+                "media_type": self.media_type,
+                "data": "".join(self.iter_base64())
+            }
+        }
+
+    def __repr__(self) -> str:
+        return f"BlobRef({self.media_type}, sha256={self.sha256})"
+
+    __str__ = __repr__
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BlobRef) and (
+            self.media_type, self.sha256) == (other.media_type, other.sha256)
+
+    def __hash__(self) -> int:
+        return hash((self.media_type, self.sha256))
+
+
+def _block(block: Any) -> Any:
+    if isinstance(block, BlobRef):
+        return block.block()
+    if isinstance(block, str):
+        return {"type": "text", "text": block}
+    return block
+
+
+def materialize(messages: List[Dict]) -> List[Dict]:
+    """Replace blob references with content blocks, just before sending.
+
+    Bare strings in content lists become text blocks. Messages without
+    blobs or strings are passed through as they are.
+    """
+    if not any(
+            isinstance(m.get("content"), list) and any(
+                isinstance(block, (BlobRef, str)) for block in m["content"])
+            for m in messages):
+        return messages
+    return [{
+        **m, "content": [_block(block) for block in m["content"]]
+    } if isinstance(m.get("content"), list) else m for m in messages]
+
+
+def redact(value: Any, limit: int = LOG_LIMIT) -> Any:
+    """Shorten long strings (such as base64 data) for logging."""
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}... <{len(value)} chars>"
+    if isinstance(value, dict):
+        return {k: redact(v, limit) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v, limit) for v in value]
+    return value
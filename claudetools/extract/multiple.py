@@ -1,24 +1,29 @@
 import re
-import json
 import logging
 from xml.etree import ElementTree as ET
 from claudetools.extract.single import extractUsingRegEx
+from claudetools.extract.repair import decodeFunctionCall
 
 logger = logging.getLogger(__name__)
 
 
-def extractMultipleFunctions(output_text: str):
+def extractMultipleFunctions(output_text: str, raw: bool = False):
     try:
         pattern = r"(<multiplefunctions>(.*?)</multiplefunctions>)"
         match = re.search(pattern, output_text, re.DOTALL)
-        logging.info(f"Multiple Function Match: {match}")
+        logger.info(f"Multiple Function Match: {match}")
         if not match:
             return None
         multiplefn = match.group(1)
-        logging.info(f"Multiple Functions Group: {multiplefn}")
+        logger.info(f"Multiple Functions Group: {multiplefn}")
         root = ET.fromstring(multiplefn)
         functions = root.findall("functioncall")
-        logging.info(f"All Function Calls: {functions}")
-        return [json.loads(fn.text) for fn in functions]
+        logger.info(f"All Function Calls: {functions}")
+        if raw:
+            return [fn.text.strip() for fn in functions]
+        return [
+            call for call in (decodeFunctionCall(fn.text) for fn in functions)
+            if call is not None
+        ]
     except ET.ParseError:
-        return extractUsingRegEx(output_text)
+        return extractUsingRegEx(output_text, raw)
@@ -0,0 +1,210 @@
+import re
+import json
+import logging
+from typing import Any, Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+INTEGER_PATTERN = re.compile(r"^[+-]?\d+$")
+NUMBER_PATTERN = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+
+
+def normalizeJson(text: str) -> str:
+    """Rewrite near-JSON into JSON.
+
+    Outside of strings, trailing commas are dropped and Python's True, False
+    and None become JSON literals; single-quoted strings become double-quoted.
+    """
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if char in "\"'":
+            quote = char
+            out.append('"')
+            i += 1
+            while i < n and text[i] != quote:
+                if text[i] == "\\" and i + 1 < n:
+                    if quote == "'" and text[i + 1] == "'":
+                        out.append("'")
+                    else:
+                        out.append(text[i:i + 2])
+                    i += 2
+                    continue
+                out.append('\\"' if text[i] == '"' else text[i])
+                i += 1
+            out.append('"')
+            i += 1
+        elif char == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] in "}]":
+                i += 1
+                continue
+            out.append(char)
+            i += 1
+        elif char.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(PYTHON_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+def lenientJsonLoads(text: str) -> Any:
+    """`json.loads` that falls back to `normalizeJson` on decode errors."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        value = json.loads(normalizeJson(text))
+        logger.info(f"Repaired malformed function call JSON: {text}")
+        return value
+
+
+def decodeFunctionCall(text: str) -> Union[Dict, None]:
+    """Decode one `<functioncall>` body, or log and return None."""
+    try:
+        return lenientJsonLoads(text)
+    except json.JSONDecodeError as err:
+        logger.warning(f"Error decoding JSON: {str(err)}")
+        return None
+
+
+def _resolve(schema: Dict, root: Dict) -> Dict:
+    ref = schema.get("$ref")
+    if not ref or not ref.startswith("#/"):
+        return schema
+    target = root
+    for part in ref[2:].split("/"):
+        target = target.get(part, {})
+    return target
+
+
+def _matches(value: Any, expected_type: str) -> bool:
+    return {
+        "string": lambda x: isinstance(x, str),
+        "number": lambda x: isinstance(x, (int, float)) and not isinstance(
+            x, bool),
+        "integer": lambda x: isinstance(x, int) and not isinstance(x, bool),
+        "boolean": lambda x: isinstance(x, bool),
+        "array": lambda x: isinstance(x, list),
+        "object": lambda x: isinstance(x, dict),
+        "null": lambda x: x is None
+    }.get(expected_type, lambda x: True)(value)
+
+
+def _coerce(value: Any, expected_type: str) -> Tuple[Any, bool]:
+    """Convert `value` to `expected_type` when that loses no information."""
+    if isinstance(value, str):
+        text = value.strip()
+        if expected_type == "integer" and INTEGER_PATTERN.match(text):
+            return int(text), True
+        if expected_type == "number" and NUMBER_PATTERN.match(text):
+            if INTEGER_PATTERN.match(text):
+                return int(text), True
+            return float(text), True
+        if expected_type == "boolean" and text.lower() in ("true", "false"):
+            return text.lower() == "true", True
+        if expected_type in ("array", "object") and text[:1] in "[{":
+            try:
+                parsed = lenientJsonLoads(text)
+            except json.JSONDecodeError:
+                return value, False
+            if _matches(parsed, expected_type):
+                return parsed, True
+    elif isinstance(value, float) and expected_type == "integer":
+        if value.is_integer():
+            return int(value), True
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if expected_type == "string":
+            return str(value), True
+    return value, False
+
+
+def _fits(value: Any, schema: Dict, root: Dict) -> bool:
+    """Whether `value` matches `schema`'s type or coerces to it safely."""
+    schema = _resolve(schema, root)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            return any(_fits(value, branch, root) for branch in schema[key])
+    expected_type = schema.get("type")
+    if not isinstance(expected_type, str):
+        return not schema
+    return _matches(value, expected_type) or _coerce(value,
+                                                     expected_type)[1]
+
+
+def _repair(value: Any, schema: Dict, root: Dict, path: str,
+            repairs: List[str]) -> Any:
+    schema = _resolve(schema, root)
+
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            branches = [_resolve(b, root) for b in schema[key]]
+            if any(_matches(value, b.get("type")) for b in branches):
+                branch = next(
+                    b for b in branches if _matches(value, b.get("type")))
+                return _repair(value, branch, root, path, repairs)
+            for branch in branches:
+                if branch.get("type") not in (None, "null"):
+                    return _repair(value, branch, root, path, repairs)
+            return value
+
+    expected_type = schema.get("type")
+    if isinstance(expected_type, str) and not _matches(value, expected_type):
+        coerced, changed = _coerce(value, expected_type)
+        # A lone scalar of the item type stands for a one-item array
+        if (not changed and expected_type == "array"
+                and isinstance(value, (str, int, float, bool))
+                and _fits(value, schema.get("items", {}), root)):
+            coerced, changed = [value], True
+        if changed:
+            repairs.append(
+                f"{path}: {json.dumps(value, default=str)} -> "
+                f"{json.dumps(coerced, default=str)} ({expected_type})")
+            value = coerced
+
+    enum = schema.get("enum")
+    if enum and isinstance(value, str) and value not in enum:
+        folded = [e for e in enum if isinstance(e, str)
+                  and e.lower() == value.lower()]
+        if len(folded) == 1:
+            repairs.append(f"{path}: {json.dumps(value)} -> "
+                           f"{json.dumps(folded[0])} (enum)")
+            value = folded[0]
+
+    if isinstance(value, list) and "items" in schema:
+        value = [
+            _repair(item, schema["items"], root, f"{path}[{index}]", repairs)
+            for index, item in enumerate(value)
+        ]
+    elif isinstance(value, dict) and "properties" in schema:
+        properties = schema["properties"]
+        value = {
+            name: _repair(item, properties[name], root, f"{path}.{name}",
+                          repairs) if name in properties else item
+            for name, item in value.items()
+        }
+    return value
+
+
+def repairParameters(parameters: Dict,
+                     schema: Dict,
+                     function_name: str = "") -> Tuple[Dict, List[str]]:
+    """Coerce near-miss parameters to the function's JSON schema.
+
+    Returns the repaired parameters and a description of every repair made.
+    Values that can't be converted safely are left for validation to reject.
+    """
+    repairs = []
+    repaired = _repair(parameters, schema, schema, function_name, repairs)
+    for repair in repairs:
+        logger.info(f"Repaired parameter {repair}")
+    return repaired, repairs
@@ -1,40 +1,44 @@
 import re
-import json
 import logging
 import xml
 from xml.etree import ElementTree as ET
+from claudetools.extract.repair import decodeFunctionCall
 
 logger = logging.getLogger(__name__)
 
 
-def extractSingleFunction(output_text: str):
+def extractSingleFunction(output_text: str, raw: bool = False):
     try:
         pattern = r"(<singlefunction>(.*?)</singlefunction>)"
         match = re.search(pattern, output_text, re.DOTALL)
-        logging.info(f"Single Function Match: {match}")
+        logger.info(f"Single Function Match: {match}")
         if not match:
             return None
         fn = match.group(1)
-        logging.info(f"Single Function Group: {fn}")
+        logger.info(f"Single Function Group: {fn}")
         root = ET.fromstring(fn)
         functions = root.findall("functioncall")
-        logging.info(f"All Function Calls: {functions}")
-        return [json.loads(fn.text) for fn in functions]
+        logger.info(f"All Function Calls: {functions}")
+        if raw:
+            return [fn.text.strip() for fn in functions]
+        return [
+            call for call in (decodeFunctionCall(fn.text) for fn in functions)
+            if call is not None
+        ]
     except ET.ParseError:
-        return extractUsingRegEx(output_text)
+        return extractUsingRegEx(output_text, raw)
 
 
-def extractUsingRegEx(output_text: str):
+def extractUsingRegEx(output_text: str, raw: bool = False):
     pattern = r"<functioncall>\s*(\{.*?\})\s*</functioncall>"
     matches = re.findall(pattern, output_text, re.DOTALL)
-    logging.info(f"Exception block Matches: {matches}")
+    logger.info(f"Exception block Matches: {matches}")
+    if raw:
+        return matches
 
     results = []
     for json_string in matches:
-        try:
-            json_data = json.loads(json_string)
+        json_data = decodeFunctionCall(json_string)
+        if json_data is not None:
             results.append(json_data)
-        except json.JSONDecodeError as err:
-            print(f"Error decoding JSON: {str(err)}")
-            continue
     return results
@@ -0,0 +1,43 @@
+import logging
+from typing import List, Dict
+from claudetools.extract.repair import decodeFunctionCall
+
+logger = logging.getLogger(__name__)
+
+OPEN_TAG = "<functioncall>"
+CLOSE_TAG = "</functioncall>"
+
+
+class FunctionCallStreamParser:
+    """Incrementally extract `<functioncall>` blocks from streamed text.
+
+    Each call is returned by `feed` as soon as its closing tag arrives, so the
+    caller can start executing it while the model is still generating.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.text = ""
+        self.count = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        self.text += chunk
+        self.buffer += chunk
+        calls = []
+        while True:
+            start = self.buffer.find(OPEN_TAG)
+            if start == -1:
+                # Keep a tail in case an opening tag is split across chunks
+                self.buffer = self.buffer[-(len(OPEN_TAG) - 1):]
+                break
+            end = self.buffer.find(CLOSE_TAG, start)
+            if end == -1:
+                self.buffer = self.buffer[start:]
+                break
+            body = self.buffer[start + len(OPEN_TAG):end].strip()
+            self.buffer = self.buffer[end + len(CLOSE_TAG):]
+            call = decodeFunctionCall(body)
+            if call is not None:
+                calls.append(call)
+                self.count += 1
+        return calls
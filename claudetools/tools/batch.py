@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple, Union
+from claudetools.extract.multiple import extractMultipleFunctions
+from claudetools.prompts.batch import MICRO_BATCH_FUNCTION_CALLS, MICRO_BATCH_SPECIFIC_CALL
+from claudetools.utils.canonical import canonical_hash
+
+logger = logging.getLogger(__name__)
+
+# tool_call arguments that steer the retry loop instead of the model call
+CALL_OPTIONS = ("validate_params", "force_tool_call", "max_retries",
+                "repair_params")
+
+
+def render_inputs(contents: List[str]) -> str:
+    return "\n".join(f'<input index="{index}">\n{content}\n</input>'
+                     for index, content in enumerate(contents))
+
+
+class _Batch:
+
+    def __init__(self, model: str, tools: List[Dict],
+                 tool_choice: Union[None, Dict],
+                 attach_system: Union[None, str], options: Dict,
+                 kwargs: Dict):
+        self.model = model
+        self.tools = tools
+        self.tool_choice = tool_choice
+        self.attach_system = attach_system
+        self.options = options
+        self.kwargs = kwargs
+        self.items: List[Tuple[str, asyncio.Future]] = []
+        self.timer = None
+
+
+class MicroBatcher:
+    """Answer many small single-function requests with one model call.
+
+    Requests for the same model, tools and arguments that arrive within
+    `max_wait` seconds (or until `max_batch_size` are waiting) are rendered as
+    indexed inputs of one `<multiplefunctions>` prompt, so the function
+    definitions are sent once per batch. The calls are split back by index and
+    validated; inputs without a valid call are re-issued individually through
+    the regular `tool_call` retry loop.
+    """
+
+    def __init__(self,
+                 tool,
+                 max_batch_size: int = 8,
+                 max_wait: float = 0.02,
+                 max_tokens_cap: int = 4096):
+        self.tool = tool
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_tokens_cap = max_tokens_cap
+        self.batches: Dict[str, _Batch] = {}
+        self.stats = {"batches": 0, "items": 0, "fallbacks": 0}
+
+    async def submit(self, model: str, content: str, tools: List[Dict],
+                     tool_choice: Union[None, Dict],
+                     attach_system: Union[None, str], **kwargs):
+        options = {
+            name: kwargs.pop(name)
+            for name in CALL_OPTIONS if name in kwargs
+        }
+        key = canonical_hash({
+            "model": model,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "attach_system": attach_system,
+            "options": options,
+            "kwargs": kwargs
+        })
+        loop = asyncio.get_event_loop()
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = _Batch(model, tools, tool_choice, attach_system, options,
+                           kwargs)
+            batch.timer = loop.call_later(self.max_wait, self._flush, key,
+                                          batch)
+            self.batches[key] = batch
+        future = loop.create_future()
+        batch.items.append((content, future))
+        if len(batch.items) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: str, batch: _Batch):
+        if self.batches.get(key) is batch:
+            del self.batches[key]
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _Batch):
+        items = [(c, f) for c, f in batch.items if not f.done()]
+        try:
+            await self._run_items(batch, items)
+        finally:
+            # No caller may be left waiting, whatever went wrong above
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(
+                        RuntimeError("Micro-batch ended without a result"))
+
+    async def _run_items(self, batch: _Batch,
+                         items: List[Tuple[str, asyncio.Future]]):
+        if len(items) <= 1:
+            await asyncio.gather(*[self._individual(batch, *item)
+                                   for item in items])
+            return
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(items)
+        system = MICRO_BATCH_FUNCTION_CALLS.format(functions=batch.tools)
+        if batch.tool_choice:
+            system += MICRO_BATCH_SPECIFIC_CALL.format(
+                function_name=batch.tool_choice.get("name"))
+        if batch.attach_system:
+            system += f"\n\nTask: {batch.attach_system}"
+        kwargs = dict(batch.kwargs)
+        if "max_tokens" in kwargs:
+            # The answer holds one function call per input; the cap never
+            # lowers what a single caller asked for
+            max_tokens = kwargs["max_tokens"]
+            kwargs["max_tokens"] = max(
+                max_tokens, min(max_tokens * len(items), self.max_tokens_cap))
+
+        logger.info(f"Micro-batching {len(items)} inputs")
+        try:
+            output = await self.tool.perform_model_call(
+                batch.model, [{
+                    "role": "user",
+                    "content": render_inputs([c for c, _ in items])
+                }],
+                system=system,
+                **kwargs)
+        except Exception as err:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        try:
+            retry = self._split(output, batch, items)
+        except Exception:
+            logger.exception("Could not split the batched function calls")
+            retry = [(c, f) for c, f in items if not f.done()]
+        if retry:
+            logger.warning(
+                f"Re-issuing {len(retry)} of {len(items)} batched inputs individually"
+            )
+            self.stats["fallbacks"] += len(retry)
+            await asyncio.gather(*[self._individual(batch, *item)
+                                   for item in retry])
+
+    def _split(self, output: str, batch: _Batch,
+               items: List[Tuple[str, asyncio.Future]]
+               ) -> List[Tuple[str, asyncio.Future]]:
+        """Resolve the items answered validly, return the others."""
+        try:
+            extracted = extractMultipleFunctions(output) or []
+        except ValueError:
+            logger.warning("Could not decode the batched function calls")
+            extracted = []
+        calls = {}
+        for call in extracted:
+            index = call.pop("index", None) if isinstance(call, dict) else None
+            if isinstance(index, int) and index not in calls:
+                calls[index] = call
+
+        retry = []
+        for index, (content, future) in enumerate(items):
+            call = calls.get(index)
+            if call is not None and self._valid(call, batch):
+                if not future.done():
+                    future.set_result(call)
+            else:
+                retry.append((content, future))
+        return retry
+
+    def _valid(self, call: Dict, batch: _Batch) -> bool:
+        if batch.tool_choice and call.get("name") != batch.tool_choice.get(
+                "name"):
+            return False
+        if batch.options.get("repair_params", True):
+            self.tool._repair_parameters(call, batch.tools)
+        if batch.options.get("validate_params", True):
+            return not self.tool._validate_parameters(call, batch.tools)
+        return any(tool["name"] == call.get("name") for tool in batch.tools)
+
+    async def _individual(self, batch: _Batch, content: str,
+                          future: asyncio.Future):
+        from claudetools.tools.tool import BaseTool
+        try:
+            result = await BaseTool.tool_call(
+                self.tool,
+                batch.model, [{
+                    "role": "user",
+                    "content": content
+                }], batch.tools, batch.tool_choice, False,
+                batch.attach_system, **batch.options, **batch.kwargs)
+        except Exception as err:
+            if not future.done():
+                future.set_exception(err)
+            return
+        if not future.done():
+            future.set_result(result)
@@ -0,0 +1,45 @@
+import logging
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+
+def tool_key(tools: List[Dict], tool_choice: Union[None, Dict]) -> str:
+    """Name the statistics bucket of a call: the chosen tool or the tool set."""
+    if tool_choice:
+        return tool_choice.get("name")
+    return ",".join(sorted(tool["name"] for tool in tools))
+
+
+class CascadeStats:
+    """Attempts and resolutions per tool and model of `tool_call`.
+
+    An attempt is resolved when its output passes extraction, the
+    `tool_choice` check and parameter validation. Comparing resolution rates
+    shows which tools the first, cheapest model of a cascade handles alone.
+    """
+
+    def __init__(self):
+        self.attempts: Dict[str, Dict[str, int]] = {}
+        self.resolved: Dict[str, Dict[str, int]] = {}
+
+    def attempt(self, tool: str, model: str):
+        models = self.attempts.setdefault(tool, {})
+        models[model] = models.get(model, 0) + 1
+
+    def resolve(self, tool: str, model: str):
+        models = self.resolved.setdefault(tool, {})
+        models[model] = models.get(model, 0) + 1
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        report = {}
+        for tool, models in self.attempts.items():
+            report[tool] = {}
+            for model, attempts in models.items():
+                resolved = self.resolved.get(tool, {}).get(model, 0)
+                report[tool][model] = {
+                    "attempts": attempts,
+                    "resolved": resolved,
+                    "resolution_rate": resolved / attempts
+                }
+        return report
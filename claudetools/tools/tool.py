@@ -1,13 +1,17 @@
+import copy
 import asyncio
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from typing import List, Dict, Union, Literal
 from claudetools.completion.complete import Complete
 from claudetools.completion.async_complete import AsyncComplete
-from claudetools.extract.single import extractSingleFunction
-from claudetools.extract.multiple import extractMultipleFunctions
-from claudetools.prompts.multi_functions import MULTI_FUNCTION_CALLS_OPEN_ENDED
-from claudetools.prompts.single_function import SINGLE_FUNCTION_OPEN_ENDED, SINGLE_FUNCTION_SPECIFIC_CALL
+from claudetools.completion.replay import RecordReplay
+from claudetools.tools.typed import normalize_tools, parse_calls, tool_identity
+from claudetools.concurrency.aimd import AdaptiveLimiter, report_response
+from claudetools.tools.cascade import CascadeStats, tool_key
+from claudetools.concurrency.singleflight import SingleFlight
+from claudetools.utils.canonical import canonical_hash
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,8 +42,15 @@ class Messages(BaseModel):
 
 class BaseTool(ABC):
 
+    @property
+    def cascade_stats(self) -> CascadeStats:
+        """Per-model outcomes of `tool_call`, created on first use."""
+        if getattr(self, "_cascade_stats", None) is None:
+            self._cascade_stats = CascadeStats()
+        return self._cascade_stats
+
     async def tool_call(self,
-                        model: str,
+                        model: Union[str, List[str]],
                         messages: List[Dict],
                         tools: List,
                         tool_choice: Union[None, Dict] = None,
@@ -48,14 +59,20 @@ class BaseTool(ABC):
                         validate_params: bool = True,
                         force_tool_call: bool = True,
                         max_retries: int = 3,
+                        repair_params: bool = True,
                         **kwargs):
         Messages.model_validate({"messages": messages})
+        # Pydantic model classes are turned into function schemas (cached)
+        model_tools = tools
+        tools, typed = normalize_tools(tools)
         Functions.model_validate({"functions": tools})
 
         # Set up system prompt
         if multiple_tools:
+            from claudetools.prompts.multi_functions import MULTI_FUNCTION_CALLS_OPEN_ENDED
             system = MULTI_FUNCTION_CALLS_OPEN_ENDED.format(functions=tools)
         else:
+            from claudetools.prompts.single_function import SINGLE_FUNCTION_OPEN_ENDED, SINGLE_FUNCTION_SPECIFIC_CALL
             if tool_choice:
                 ToolChoice.model_validate(tool_choice)
                 tool_name = tool_choice.get("name")
@@ -67,20 +84,52 @@ class BaseTool(ABC):
         if attach_system:
             system += f"\n\nTask: {attach_system}"
 
+        # A list of models is a cascade: every retry escalates to the next one
+        models = [model] if isinstance(model, str) else list(model)
+        if not models:
+            raise ValueError("At least one model is required")
+        max_retries = max(max_retries, len(models))
+        stats_key = tool_key(tools, tool_choice)
+
         # Handle retries if force_tool_call is enabled
         retries = 0
         while retries < max_retries:
             logger.info(f"Attempt {retries + 1} of {max_retries}")
-            output = await self.perform_model_call(model,
+            attempt_model = models[min(retries, len(models) - 1)]
+            if 0 < retries < len(models):
+                logger.info(f"Escalating to model '{attempt_model}'")
+            self.cascade_stats.attempt(stats_key, attempt_model)
+            output = await self.perform_model_call(attempt_model,
                                                    messages,
                                                    system=system,
                                                    **kwargs)
 
             if multiple_tools:
-                function_output = extractMultipleFunctions(output)
+                from claudetools.extract.multiple import extractMultipleFunctions
+                function_output = extractMultipleFunctions(output, raw=typed)
             else:
-                function_output = extractSingleFunction(output)
+                from claudetools.extract.single import extractSingleFunction
+                function_output = extractSingleFunction(output, raw=typed)
                 # For single tool mode, take only the first function
+                function_output = function_output[:1] if function_output else None
+
+            # Model tools are parsed and validated straight from the raw JSON
+            if typed and function_output:
+                function_output, parse_errors = parse_calls(
+                    function_output, model_tools)
+                if parse_errors:
+                    if force_tool_call and retries < max_retries - 1:
+                        logger.warning(
+                            f"Parameter validation failed: {parse_errors}. Retrying..."
+                        )
+                        system += f"\n\nYour previous response had validation errors: {parse_errors}. Please try again with valid parameters."
+                        retries += 1
+                        continue
+                    else:
+                        raise ValueError(
+                            f"Parameter validation failed: {parse_errors}")
+
+            if not multiple_tools:
                 function_output = function_output[
                     0] if function_output else None
 
@@ -117,6 +166,10 @@ class BaseTool(ABC):
                                     f"Selected tool '{selected_tool}' does not match required tool '{required_tool}'"
                                 )
 
+                # Fix near-miss parameters locally instead of retrying
+                if repair_params:
+                    self._repair_parameters(function_output, tools)
+
                 # Validate parameters if needed
                 if validate_params:
                     validation_errors = self._validate_parameters(
@@ -133,6 +186,7 @@ class BaseTool(ABC):
                             raise ValueError(
                                 f"Parameter validation failed: {validation_errors}"
                             )
+                self.cascade_stats.resolve(stats_key, attempt_model)
                 return function_output
 
             # No function call detected
@@ -152,6 +206,24 @@ class BaseTool(ABC):
 
         return None
 
+    def _repair_parameters(self, function_output: Union[Dict, List[Dict]],
+                           tools: List[Dict]):
+        """Coerce parameters to their function schemas in place."""
+        from claudetools.extract.repair import repairParameters
+        if isinstance(function_output, dict):
+            function_output = [function_output]
+
+        for call in function_output:
+            function_name = call.get('name')
+            parameters = call.get('parameters')
+            function_schema = next(
+                (t for t in tools if t['name'] == function_name), None)
+            if not function_schema or not isinstance(parameters, dict):
+                continue
+            call['parameters'], _ = repairParameters(
+                parameters, function_schema.get('parameters', {}),
+                function_name)
+
     def _validate_parameters(self, function_output: Union[Dict, List[Dict]],
                              tools: List[Dict]) -> List[str]:
         """Validate parameters against function schemas."""
@@ -163,6 +235,14 @@ class BaseTool(ABC):
         for call in function_output:
             function_name = call.get('name')
             parameters = call.get('parameters', {})
+            if isinstance(parameters, BaseModel):
+                # Already validated against its model while parsing
+                continue
+            if not isinstance(parameters, dict):
+                validation_errors.append(
+                    f"Parameters for function '{function_name}' should be an object"
+                )
+                continue
 
             # Find matching function schema
             function_schema = next(
@@ -222,18 +302,22 @@ class Tool(BaseTool):
                  aws_access_key: Union[str, None] = None,
                  aws_secret_key: Union[str, None] = None,
                  aws_region: Union[str, None] = None,
-                 aws_session_token: Union[str, None] = None):
+                 aws_session_token: Union[str, None] = None,
+                 anthropic_base_url: Union[str, None] = None,
+                 record_replay: Union[RecordReplay, None] = None):
         self.complete = Complete(anthropic_api_key=anthropic_api_key,
                                  aws_secret_key=aws_secret_key,
                                  aws_access_key=aws_access_key,
                                  aws_region=aws_region,
-                                 aws_session_token=aws_session_token)
+                                 aws_session_token=aws_session_token,
+                                 anthropic_base_url=anthropic_base_url,
+                                 record_replay=record_replay)
 
     async def perform_model_call(self, model, messages, system, **kwargs):
         return self.complete(model, messages, system=system, **kwargs)
 
     def __call__(self,
-                 model: str,
+                 model: Union[str, List[str]],
                  messages: List[Dict],
                  tools: List,
                  tool_choice: Union[None, Dict] = None,
@@ -252,20 +336,112 @@ class AsyncTool(BaseTool):
                  aws_access_key: Union[str, None] = None,
                  aws_secret_key: Union[str, None] = None,
                  aws_region: Union[str, None] = None,
-                 aws_session_token: Union[str, None] = None):
+                 aws_session_token: Union[str, None] = None,
+                 anthropic_base_url: Union[str, None] = None,
+                 record_replay: Union[RecordReplay, None] = None,
+                 limiter: Union[AdaptiveLimiter, None] = None,
+                 coalesce: bool = False,
+                 micro_batch_size: Union[int, None] = None,
+                 micro_batch_wait: float = 0.02):
+        http_client = None
+        if limiter is not None and (record_replay is None
+                                    or record_replay.mode == "record"):
+            # Report throttles the client retries internally to the limiter
+            from anthropic import DefaultAsyncHttpxClient
+            http_client = DefaultAsyncHttpxClient(
+                event_hooks={"response": [report_response]})
         # self.complete = AsyncComplete(anthropic_api_key, anthropic_version,
         #                               anthropic_base_url)
         self.complete = AsyncComplete(anthropic_api_key=anthropic_api_key,
                                       aws_secret_key=aws_secret_key,
                                       aws_access_key=aws_access_key,
                                       aws_region=aws_region,
-                                      aws_session_token=aws_session_token)
+                                      aws_session_token=aws_session_token,
+                                      anthropic_base_url=anthropic_base_url,
+                                      record_replay=record_replay,
+                                      http_client=http_client)
+        self.limiter = limiter
+        self.backend = "anthropic" if anthropic_api_key else "bedrock"
+        self.coalesce = coalesce
+        self.singleflight = SingleFlight()
+        self.batcher = None
+        if micro_batch_size:
+            from claudetools.tools.batch import MicroBatcher
+            self.batcher = MicroBatcher(self, micro_batch_size,
+                                        micro_batch_wait)
+
+    @property
+    def coalesced_calls(self) -> int:
+        """Number of `tool_call`s served by an identical in-flight call."""
+        return self.singleflight.saved
+
+    async def tool_call(self,
+                        model: Union[str, List[str]],
+                        messages: List[Dict],
+                        tools: List,
+                        tool_choice: Union[None, Dict] = None,
+                        multiple_tools=False,
+                        attach_system: Union[None, str] = None,
+                        **kwargs):
+        if not self.coalesce:
+            return await self._dispatch(model, messages, tools, tool_choice,
+                                        multiple_tools, attach_system,
+                                        **kwargs)
+        # Concurrent identical requests share one model call and extraction
+        key = canonical_hash({
+            "model": model,
+            "messages": messages,
+            "tools": [tool_identity(tool) for tool in tools],
+            "tool_choice": tool_choice,
+            "multiple_tools": multiple_tools,
+            "attach_system": attach_system,
+            "kwargs": kwargs
+        })
+        output = await self.singleflight.do(
+            key, lambda: self._dispatch(model, messages, tools, tool_choice,
+                                        multiple_tools, attach_system,
+                                        **kwargs))
+        # Every caller gets its own copy of the shared result
+        return copy.deepcopy(output)
+
+    async def _dispatch(self, model, messages, tools, tool_choice,
+                        multiple_tools, attach_system, **kwargs):
+        # Single-turn, single-function requests can share a batched call
+        if (self.batcher is not None and isinstance(model, str)
+                and not multiple_tools and len(messages) == 1
+                and messages[0].get("role") == "user"
+                and isinstance(messages[0].get("content"), str)
+                and all(isinstance(tool, dict) for tool in tools)):
+            Functions.model_validate({"functions": tools})
+            if tool_choice:
+                ToolChoice.model_validate(tool_choice)
+            return await self.batcher.submit(model,
+                                             messages[0]["content"], tools,
+                                             tool_choice, attach_system,
+                                             **kwargs)
+        return await super().tool_call(model, messages, tools, tool_choice,
+                                       multiple_tools, attach_system,
+                                       **kwargs)
+
+    @asynccontextmanager
+    async def model_slot(self, model: str):
+        """Hold a limiter slot for one model call, if a limiter is set."""
+        if self.limiter is None:
+            yield
+            return
+        # Concurrency adapts separately for every backend and model
+        async with self.limiter.slot((self.backend, model)):
+            yield
 
     async def perform_model_call(self, model, messages, system, **kwargs):
-        return await self.complete(model, messages, system=system, **kwargs)
+        async with self.model_slot(model):
+            return await self.complete(model,
+                                       messages,
+                                       system=system,
+                                       **kwargs)
 
     async def __call__(self,
-                       model: str,
+                       model: Union[str, List[str]],
                        messages: List[Dict],
                        tools: List,
                        tool_choice: Union[None, Dict] = None,
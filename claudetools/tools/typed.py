@@ -0,0 +1,100 @@
+import json
+import logging
+from functools import lru_cache
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, create_model
+from typing import Any, Dict, List, Literal, Tuple, Union
+from claudetools.utils.canonical import canonical_json
+
+try:
+    from typing import Annotated
+except ImportError:
+    from typing_extensions import Annotated
+
+logger = logging.getLogger(__name__)
+
+
+def is_model_tool(tool) -> bool:
+    return isinstance(tool, type) and issubclass(tool, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def model_tool_spec(model) -> Dict:
+    """Derive the function schema of a pydantic model tool once."""
+    schema = model.model_json_schema()
+    return {
+        "name": model.__name__,
+        "description": schema.get("description", ""),
+        "parameters": schema
+    }
+
+
+def tool_identity(tool) -> Union[Dict, str]:
+    """JSON-serializable identity of a tool, for hashing requests."""
+    if is_model_tool(tool):
+        return f"{tool.__module__}.{tool.__qualname__}"
+    return tool
+
+
+def normalize_tools(tools: List) -> Tuple[List[Dict], bool]:
+    """Return the tools as function schemas and whether any is a model."""
+    typed = any(is_model_tool(tool) for tool in tools)
+    if not typed:
+        return tools, False
+    return [
+        model_tool_spec(tool) if is_model_tool(tool) else tool
+        for tool in tools
+    ], True
+
+
+@lru_cache(maxsize=128)
+def _call_adapter(key: Tuple) -> TypeAdapter:
+    call_models = []
+    for entry in key:
+        if is_model_tool(entry):
+            name, parameters = model_tool_spec(entry)["name"], entry
+        else:
+            name, parameters = json.loads(entry)["name"], Dict[str, Any]
+        call_models.append(
+            create_model(f"{name}Call",
+                         name=(Literal[name], ...),
+                         parameters=(parameters, ...)))
+    if len(call_models) == 1:
+        return TypeAdapter(call_models[0])
+    return TypeAdapter(
+        Annotated[Union[tuple(call_models)],
+                  Field(discriminator="name")])
+
+
+def call_adapter(tools: List) -> TypeAdapter:
+    """Build (once per tool set) a validator for a whole `<functioncall>`."""
+    key = tuple(tool if is_model_tool(tool) else canonical_json(tool)
+                for tool in tools)
+    return _call_adapter(key)
+
+
+def parse_calls(raw_calls: List[str],
+                tools: List) -> Tuple[List[Dict], List[str]]:
+    """Parse and validate raw `<functioncall>` JSON in a single pass.
+
+    Parameters of model tools come back as model instances, the parameters of
+    dict tools as plain dicts.
+    """
+    adapter = call_adapter(tools)
+    calls, errors = [], []
+    for raw in raw_calls:
+        try:
+            try:
+                call = adapter.validate_json(raw)
+            except ValidationError as err:
+                if not any(e["type"] == "json_invalid" for e in err.errors()):
+                    raise
+                # Retry near-JSON (trailing commas, single quotes) once fixed
+                from claudetools.extract.repair import normalizeJson
+                call = adapter.validate_json(normalizeJson(raw))
+                logger.info(f"Repaired malformed function call JSON: {raw}")
+        except ValidationError as err:
+            errors.extend(f"{'.'.join(str(loc) for loc in e['loc'])}: "
+                          f"{e['msg']}" for e in err.errors())
+            continue
+        calls.append({"name": call.name, "parameters": call.parameters})
+    return calls, errors
@@ -0,0 +1,17 @@
+import json
+import hashlib
+from typing import Any
+
+
+def canonical_json(obj: Any) -> str:
+    """Serialize `obj` deterministically: sorted keys, no whitespace."""
+    return json.dumps(obj,
+                      sort_keys=True,
+                      separators=(",", ":"),
+                      ensure_ascii=False,
+                      default=str)
+
+
+def canonical_hash(obj: Any) -> str:
+    """Return the SHA-256 hex digest of the canonical JSON of `obj`."""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
@@ -1,6 +1,10 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
 
-ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
+def __getattr__(name):
+    # The .env file is only read when a setting is first accessed
+    if name == "ANTHROPIC_API_KEY":
+        from dotenv import load_dotenv
+        load_dotenv()
+        return os.environ.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
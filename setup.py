@@ -10,6 +10,7 @@ setup(
     long_description=open("Readme.md").read(),
     long_description_content_type="text/markdown",
     url="https://github.com/vatsalsaglani/claudetools",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
+    entry_points={"console_scripts": ["claudetools=claudetools.cli:main"]},
     install_requires=["httpx>=0.25.0", "anthropic>=0.31.0", "pydantic>=2.4.2"],
     python_requires=">=3.7")
@@ -0,0 +1,68 @@
+import asyncio
+from claudetools.tools.tool import AsyncTool
+
+functions = [{
+    "name": "AddTodo",
+    "description": "Add a TODO with text to remember.",
+    "parameters": {
+        "properties": {
+            "text": {
+                "title": "Text",
+                "type": "string"
+            }
+        },
+        "required": ["text"],
+        "title": "AddTodo",
+        "type": "object"
+    }
+}]
+
+user_messages = [{"role": "user", "content": "I need to do my laundary"}]
+
+# Canned model outputs for `functions`: a valid call and one missing `text`
+GOOD = """<singlefunction><functioncall> {"name": "AddTodo", "parameters": {"text": "laundary"}} </functioncall></singlefunction>"""
+BAD = """<singlefunction><functioncall> {"name": "AddTodo", "parameters": {"todo": "laundary"}} </functioncall></singlefunction>"""
+
+
+class FakeComplete:
+    """Stand-in for `AsyncTool.complete` that records every call.
+
+    `outputs` is a list served in order, a dict from model to output or a
+    function of the request returning the output. Each call first sleeps
+    `delay` seconds.
+    """
+
+    def __init__(self, outputs, delay: float = 0.0):
+        self.outputs = list(outputs) if isinstance(outputs, list) else outputs
+        self.delay = delay
+        self.calls = []
+        self.cancelled = 0
+
+    @property
+    def models(self):
+        return [model for model, _, _, _ in self.calls]
+
+    @property
+    def systems(self):
+        return [system for _, _, system, _ in self.calls]
+
+    async def __call__(self, model, messages, system, **kwargs):
+        self.calls.append((model, messages, system, kwargs))
+        if self.delay:
+            try:
+                await asyncio.sleep(self.delay)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        if isinstance(self.outputs, list):
+            return self.outputs.pop(0)
+        if isinstance(self.outputs, dict):
+            return self.outputs[model]
+        return self.outputs(model, messages, system, **kwargs)
+
+
+def make_tool(outputs, delay: float = 0.0, **kwargs) -> AsyncTool:
+    """An `AsyncTool` answered by a `FakeComplete`."""
+    tool = AsyncTool(anthropic_api_key="test", **kwargs)
+    tool.complete = FakeComplete(outputs, delay)
+    return tool
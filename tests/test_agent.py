@@ -0,0 +1,255 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from claudetools.tools.tool import AsyncTool
+from claudetools.agent.agent import AsyncAgent
+from claudetools.extract.stream import FunctionCallStreamParser
+
+functions = [{
+    "name": "getWeather",
+    "description": "Get the weather of a city.",
+    "parameters": {
+        "properties": {
+            "city": {
+                "title": "City",
+                "type": "string"
+            }
+        },
+        "required": ["city"],
+        "title": "GetWeather",
+        "type": "object"
+    }
+}]
+
+STEP_ONE = """<multiplefunctions>
+    <functioncall> {"name": "getWeather", "parameters": {"city": "NY"}} </functioncall>
+    <functioncall> {"name": "getWeather", "parameters": {"city": "LA"}} </functioncall>
+</multiplefunctions>"""
+
+FINAL = "It is 10 degrees warmer in LA."
+
+
+class FakeStream:
+
+    def __init__(self, text, chunk_delay, fail_after=None):
+        self.text = text
+        self.chunk_delay = chunk_delay
+        self.fail_after = fail_after
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    @property
+    async def text_stream(self):
+        for i in range(0, len(self.text), 8):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("stream dropped")
+            await asyncio.sleep(self.chunk_delay)
+            yield self.text[i:i + 8]
+
+    async def get_final_message(self):
+        self.finished = time.perf_counter()
+        return fake_message(self.text)
+
+
+def fake_message(text):
+    return SimpleNamespace(content=[SimpleNamespace(text=text)],
+                           usage=SimpleNamespace(input_tokens=100,
+                                                 output_tokens=20))
+
+
+class FakeComplete:
+
+    def __init__(self, outputs, chunk_delay=0.0):
+        self.outputs = list(outputs)
+        self.chunk_delay = chunk_delay
+        self.calls = []
+        self.streams = []
+
+    async def create(self, model, messages, **kwargs):
+        self.calls.append(list(messages))
+        return fake_message(self.outputs.pop(0))
+
+    def stream(self, model, messages, **kwargs):
+        self.calls.append(list(messages))
+        self.streams.append(FakeStream(self.outputs.pop(0), self.chunk_delay))
+        return self.streams[-1]
+
+
+def make_agent(outputs, handlers, **kwargs):
+    tool = AsyncTool(anthropic_api_key="test")
+    tool.complete = FakeComplete(outputs, kwargs.pop("chunk_delay", 0.0))
+    return AsyncAgent(tool, handlers, **kwargs), tool.complete
+
+
+def test_stream_parser_handles_split_tags():
+    parser = FunctionCallStreamParser()
+    calls = []
+    for i in range(0, len(STEP_ONE), 3):
+        calls.extend(parser.feed(STEP_ONE[i:i + 3]))
+    assert [c["parameters"]["city"] for c in calls] == ["NY", "LA"]
+    assert parser.text == STEP_ONE
+
+
+def test_agent_feeds_results_back():
+    temps = {"NY": 15, "LA": 25}
+    agent, complete = make_agent(
+        [STEP_ONE, FINAL], {"getWeather": lambda city: {
+            "temp": temps[city]
+        }},
+        stream=False)
+    result = asyncio.run(
+        agent.run("claude-3-haiku-20240307", [{
+            "role": "user",
+            "content": "Compare NY and LA"
+        }],
+                  functions,
+                  max_tokens=100))
+    assert result.stop_reason == "final"
+    assert result.output == FINAL
+    assert len(result.steps) == 2
+    feedback = complete.calls[1][-1]["content"]
+    assert '<result index="1" name="getWeather">{"temp":25}</result>' in feedback
+    assert result.input_tokens == 200
+
+
+def test_agent_reports_errors_and_budget():
+
+    async def getWeather(city):
+        raise RuntimeError("backend down")
+
+    agent, complete = make_agent([
+        STEP_ONE.replace('"city": "LA"', '"town": "LA"'),
+    ], {"getWeather": getWeather},
+                                 stream=False,
+                                 token_budget=50)
+    result = asyncio.run(
+        agent.run("claude-3-haiku-20240307", [{
+            "role": "user",
+            "content": "Compare NY and LA"
+        }], functions))
+    assert result.stop_reason == "token_budget"
+    errors = [r.error for r in result.steps[0].results]
+    assert errors[0] == "RuntimeError: backend down"
+    assert "Missing required parameter 'city'" in errors[1]
+
+
+def test_streaming_overlaps_execution():
+    started = []
+
+    async def getWeather(city):
+        started.append(time.perf_counter())
+        await asyncio.sleep(0.05)
+        return {"city": city}
+
+    agent, complete = make_agent([STEP_ONE, FINAL],
+                                 {"getWeather": getWeather},
+                                 chunk_delay=0.01)
+    result = asyncio.run(
+        agent.run("claude-3-haiku-20240307", [{
+            "role": "user",
+            "content": "Compare NY and LA"
+        }], functions))
+    assert result.stop_reason == "final"
+    assert len(result.steps[0].results) == 2
+    # The first call starts while the rest of step one is still streaming
+    assert started[0] < complete.streams[0].finished
+
+
+def test_failed_stream_cancels_started_calls():
+    finished = []
+
+    async def getWeather(city):
+        await asyncio.sleep(0.2)
+        finished.append(city)
+
+    agent, complete = make_agent([STEP_ONE], {"getWeather": getWeather},
+                                 chunk_delay=0.01)
+    complete.stream = lambda model, messages, **kwargs: FakeStream(
+        STEP_ONE, 0.01, fail_after=STEP_ONE.index("LA"))
+
+    async def run():
+        try:
+            await agent.run("claude-3-haiku-20240307", [{
+                "role": "user",
+                "content": "Compare NY and LA"
+            }], functions)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("the stream error was swallowed")
+        await asyncio.sleep(0.3)
+
+    asyncio.run(run())
+    assert finished == []
+
+
+def test_malformed_calls_are_reported_as_errors():
+    finished = []
+
+    async def getWeather(city):
+        finished.append(city)
+        return {"city": city}
+
+    step = STEP_ONE.replace(
+        '{"name": "getWeather", "parameters": {"city": "LA"}}',
+        '["getWeather"]')
+    agent, complete = make_agent([step, FINAL], {"getWeather": getWeather},
+                                 stream=False)
+    result = asyncio.run(
+        agent.run("claude-3-haiku-20240307", [{
+            "role": "user",
+            "content": "Compare NY and LA"
+        }], functions))
+    assert result.stop_reason == "final"
+    errors = [r.error for r in result.steps[0].results]
+    assert errors == [None, 'Malformed function call: ["getWeather"]']
+    assert finished == ["NY"]
+
+
+def test_failed_step_cancels_its_calls():
+    finished = []
+
+    async def getWeather(city):
+        if city == "LA":
+            raise asyncio.CancelledError()
+        await asyncio.sleep(0.2)
+        finished.append(city)
+
+    agent, complete = make_agent([STEP_ONE], {"getWeather": getWeather},
+                                 stream=False)
+
+    async def run():
+        try:
+            await agent.run("claude-3-haiku-20240307", [{
+                "role": "user",
+                "content": "Compare NY and LA"
+            }], functions)
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.3)
+
+    asyncio.run(run())
+    assert finished == []
+
+
+def test_repair_can_be_turned_off():
+    step = STEP_ONE.replace('"city": "LA"', '"city": 5')
+    outputs = []
+    for repair_params in (True, False):
+        agent, complete = make_agent([step, FINAL],
+                                     {"getWeather": lambda city: city},
+                                     stream=False)
+        result = asyncio.run(
+            agent.run("claude-3-haiku-20240307", [{
+                "role": "user",
+                "content": "Compare NY and LA"
+            }],
+                      functions,
+                      repair_params=repair_params))
+        outputs.append(result.steps[0].results[1])
+    assert outputs[0].output == "5"
+    assert "should be of type string" in outputs[1].error
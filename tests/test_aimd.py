@@ -0,0 +1,137 @@
+import asyncio
+import time
+from benchmarks.mock_server import MockConfig, MockServer
+from claudetools.concurrency.aimd import AdaptiveLimiter
+from claudetools.tools.tool import AsyncTool
+from claudetools.agent.agent import AsyncAgent
+from tests.conftest import functions, user_messages
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+class SimulatedServer:
+    """Serves `capacity` requests at once and throttles everything beyond."""
+
+    def __init__(self, capacity, latency=0.01):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.served = 0
+        self.throttled = 0
+
+    async def __call__(self, model, messages, system, **kwargs):
+        self.in_flight += 1
+        try:
+            if self.in_flight > self.capacity:
+                self.throttled += 1
+                await asyncio.sleep(self.latency / 10)
+                raise Throttled("rate limited")
+            await asyncio.sleep(self.latency)
+            self.served += 1
+            return "ok"
+        finally:
+            self.in_flight -= 1
+
+
+async def drive(tool, model, duration, callers=100):
+    deadline = time.monotonic() + duration
+
+    async def caller():
+        while time.monotonic() < deadline:
+            try:
+                await tool.perform_model_call(model, [], system="")
+            except Throttled:
+                pass
+
+    await asyncio.gather(*[caller() for _ in range(callers)])
+
+
+def test_limit_converges_near_capacity():
+    limiter = AdaptiveLimiter(initial_limit=1)
+    tool = AsyncTool(anthropic_api_key="test", limiter=limiter)
+    server = tool.complete = SimulatedServer(capacity=20)
+    duration = 2.0
+    asyncio.run(drive(tool, "claude-3-haiku-20240307", duration))
+
+    limit = limiter.limit(("anthropic", "claude-3-haiku-20240307"))
+    assert 10 <= limit <= 30
+    # AIMD keeps throughput within reach of the 20 / 0.01s optimum
+    optimum = server.capacity / server.latency * duration
+    assert server.served > 0.5 * optimum
+    assert server.throttled < server.served
+
+
+def test_state_is_kept_per_model():
+    limiter = AdaptiveLimiter(initial_limit=2)
+    tool = AsyncTool(anthropic_api_key="test", limiter=limiter)
+    tool.complete = SimulatedServer(capacity=1)
+    asyncio.run(drive(tool, "claude-3-haiku-20240307", 0.3, callers=10))
+    tool.complete = SimulatedServer(capacity=50)
+    asyncio.run(drive(tool, "claude-3-5-sonnet-20240620", 0.5, callers=50))
+
+    metrics = limiter.metrics()
+    small = metrics[str(("anthropic", "claude-3-haiku-20240307"))]
+    large = metrics[str(("anthropic", "claude-3-5-sonnet-20240620"))]
+    assert small["limit"] < 3 and small["throttles"] > 0
+    assert large["limit"] > small["limit"]
+
+
+class ThrottledStream:
+
+    async def __aenter__(self):
+        raise Throttled("rate limited")
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def test_agent_calls_share_the_limiter():
+    limiter = AdaptiveLimiter(initial_limit=4)
+    tool = AsyncTool(anthropic_api_key="test", limiter=limiter)
+    tool.complete.stream = lambda model, messages, **kwargs: ThrottledStream()
+    agent = AsyncAgent(tool, {})
+
+    async def run():
+        try:
+            await agent.run("claude-3-haiku-20240307", [{
+                "role": "user",
+                "content": "hi"
+            }], [])
+        except Throttled:
+            pass
+
+    asyncio.run(run())
+    metrics = limiter.metrics()[str(("anthropic", "claude-3-haiku-20240307"))]
+    assert metrics["throttles"] == 1 and metrics["limit"] == 2
+
+
+def test_client_retried_throttles_reach_the_limiter():
+    limiter = AdaptiveLimiter(initial_limit=8)
+    config = MockConfig(latency="constant",
+                        latency_ms=1,
+                        rate_limit_rate=0.5,
+                        seed=7)
+    with MockServer(config) as server:
+        tool = AsyncTool(anthropic_api_key="test",
+                         anthropic_base_url=server.base_url,
+                         limiter=limiter)
+
+        async def main():
+            return await asyncio.gather(*[
+                tool("claude-3-haiku-20240307",
+                     user_messages,
+                     functions,
+                     max_tokens=100)
+                for _ in range(20)
+            ],
+                                        return_exceptions=True)
+
+        asyncio.run(main())
+        rate_limited = server.state.rate_limited
+
+    metrics = limiter.metrics()[str(("anthropic", "claude-3-haiku-20240307"))]
+    assert rate_limited > 0
+    assert metrics["throttles"] == rate_limited
+    assert metrics["limit"] < 8
@@ -0,0 +1,78 @@
+import base64
+import asyncio
+import logging
+from types import SimpleNamespace
+from claudetools.content.blob import BlobRef, materialize
+from claudetools.completion.replay import RecordReplay
+from claudetools.tools.tool import AsyncTool
+from tests.conftest import functions
+
+MODEL = "claude-3-haiku-20240307"
+DATA = bytes(range(256)) * 4000
+TEXT = {"type": "text", "text": "Add a todo"}
+OUTPUT = """<singlefunction><functioncall> {"name": "AddTodo", "parameters": {"text": "review report"}} </functioncall></singlefunction>"""
+
+
+def test_blob_from_path_matches_bytes(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(DATA)
+    blob = BlobRef.from_path(str(path))
+    assert blob.media_type == "application/pdf"
+    assert blob.kind == "document"
+    assert blob.size == len(DATA)
+    assert blob == BlobRef.from_bytes(DATA, "application/pdf")
+    assert "".join(blob.iter_base64(chunk_size=3000)) == base64.b64encode(
+        DATA).decode("ascii")
+    assert blob.sha256 in repr(blob) and len(repr(blob)) < 120
+
+
+def test_materialize_leaves_messages_untouched():
+    blob = BlobRef.from_bytes(DATA, "image/png")
+    text = {"role": "user", "content": "hello"}
+    messages = [text, {"role": "user", "content": [blob, TEXT]}]
+    sent = materialize(messages)
+    assert sent[0] is text
+    assert sent[1]["content"][0]["type"] == "image"
+    assert base64.b64decode(sent[1]["content"][0]["source"]["data"]) == DATA
+    assert messages[1]["content"][0] is blob
+    assert materialize([text]) == [text]
+
+
+def test_materialize_wraps_bare_strings():
+    messages = [{"role": "user", "content": ["describe", TEXT]}]
+    assert materialize(messages)[0]["content"] == [
+        {"type": "text", "text": "describe"}, TEXT]
+    assert messages[0]["content"][0] == "describe"
+
+
+def test_blob_is_encoded_per_send_and_never_logged(tmp_path, caplog):
+    sent = []
+
+    async def create(model, messages, **kwargs):
+        sent.append(messages)
+        return SimpleNamespace(content=[SimpleNamespace(text=OUTPUT)])
+
+    tool = AsyncTool(anthropic_api_key="test")
+    tool.complete.client = SimpleNamespace(messages=SimpleNamespace(
+        create=create))
+    messages = [{
+        "role": "user",
+        "content": [BlobRef.from_bytes(DATA, "image/png"), TEXT]
+    }]
+    with caplog.at_level(logging.INFO):
+        output = asyncio.run(tool(MODEL, messages, functions, max_tokens=100))
+    assert output["parameters"] == {"text": "review report"}
+    assert sent[0][0]["content"] == [{
+        "type": "image", "source": sent[0][0]["content"][0]["source"]
+    }, TEXT]
+    assert isinstance(messages[0]["content"][0], BlobRef)
+    encoded = base64.b64encode(DATA).decode("ascii")
+    assert encoded[:2000] not in caplog.text
+
+    # Request keys depend on the content, not on the object or its location
+    copy = [{
+        "role": "user",
+        "content": [BlobRef.from_bytes(bytes(DATA), "image/png"), TEXT]
+    }]
+    replay = RecordReplay(str(tmp_path / "recording.jsonl"), mode="record")
+    assert replay.key(MODEL, messages) == replay.key(MODEL, copy)
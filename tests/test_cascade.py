@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from claudetools.tools.tool import BaseTool
+from tests.conftest import BAD, GOOD, functions, make_tool, user_messages
+
+FAST, LARGE = "claude-3-haiku-20240307", "claude-3-5-sonnet-20240620"
+
+
+def test_fast_model_resolves_without_escalation():
+    tool = make_tool({FAST: GOOD, LARGE: GOOD})
+    output = asyncio.run(tool([FAST, LARGE], user_messages, functions))
+    assert output["parameters"] == {"text": "laundary"}
+    assert tool.complete.models == [FAST]
+
+
+def test_escalates_on_validation_failure():
+    tool = make_tool({FAST: BAD, LARGE: GOOD})
+    output = asyncio.run(tool([FAST, LARGE], user_messages, functions))
+    assert output["parameters"] == {"text": "laundary"}
+    assert tool.complete.models == [FAST, LARGE]
+
+    tool.complete.outputs[FAST] = "Sorry, I can't help with that."
+    asyncio.run(tool([FAST, LARGE], user_messages, functions))
+    assert tool.complete.models == [FAST, LARGE, FAST, LARGE]
+
+    report = tool.cascade_stats.report()["AddTodo"]
+    assert report[FAST] == {
+        "attempts": 2,
+        "resolved": 0,
+        "resolution_rate": 0.0
+    }
+    assert report[LARGE]["resolution_rate"] == 1.0
+
+
+def test_cascade_gets_at_least_one_attempt_per_model():
+    third = "claude-3-opus-20240229"
+    tool = make_tool({FAST: BAD, LARGE: BAD, third: GOOD})
+    asyncio.run(
+        tool([FAST, LARGE, third], user_messages, functions, max_retries=1))
+    assert tool.complete.models == [FAST, LARGE, third]
+
+
+def test_custom_base_tool_and_empty_cascade():
+
+    class EchoTool(BaseTool):
+
+        async def perform_model_call(self, model, messages, system, **kwargs):
+            return GOOD
+
+    tool = EchoTool()
+    output = asyncio.run(tool.tool_call("model", user_messages, functions))
+    assert output["name"] == "AddTodo"
+    assert tool.cascade_stats.report()["AddTodo"]
+    with pytest.raises(ValueError):
+        asyncio.run(tool.tool_call([], user_messages, functions))
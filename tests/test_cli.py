@@ -0,0 +1,100 @@
+import sys
+import json
+import subprocess
+from benchmarks.mock_server import MockConfig, MockServer
+from claudetools.cli import Progress, main
+from tests.conftest import functions
+
+
+def test_cli_resumes_from_checkpoint(tmp_path):
+    tools_path = tmp_path / "tools.json"
+    tools_path.write_text(json.dumps(functions))
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text("\n".join(
+        json.dumps({
+            "id": f"c{i}",
+            "messages": [{
+                "role": "user",
+                "content": f"Todo number {i}"
+            }]
+        }) for i in range(10)))
+    output_path = tmp_path / "output.jsonl"
+    checkpoint_path = tmp_path / "output.jsonl.checkpoint"
+    # Pretend an earlier run finished the first four conversations
+    checkpoint_path.write_text("c0\nc1\nc2\nc3\n")
+
+    with MockServer(MockConfig(latency="constant", latency_ms=1)) as server:
+        code = main([
+            str(input_path), "--tools",
+            str(tools_path), "--model", "claude-3-haiku-20240307",
+            "--output",
+            str(output_path), "--concurrency", "3", "--anthropic-api-key",
+            "test", "--anthropic-base-url", server.base_url
+        ])
+        assert code == 0
+        assert server.state.requests == 6
+
+    results = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert sorted(r["id"] for r in results) == [f"c{i}" for i in range(4, 10)]
+    assert all(r["output"]["name"] == "AddTodo" for r in results)
+    assert len(checkpoint_path.read_text().split()) == 10
+
+
+def test_malformed_lines_fail_without_stopping_the_run(tmp_path):
+    tools_path = tmp_path / "tools.json"
+    tools_path.write_text(json.dumps(functions))
+    input_path = tmp_path / "input.jsonl"
+    lines = [
+        json.dumps({
+            "id": f"c{i}",
+            "messages": [{
+                "role": "user",
+                "content": f"Todo number {i}"
+            }]
+        }) for i in range(3)
+    ]
+    lines[1] = '{"id": "c1", "messages": ['
+    input_path.write_text("\n".join(lines + ["[1, 2]"]))
+    output_path = tmp_path / "output.jsonl"
+
+    with MockServer(MockConfig(latency="constant", latency_ms=1)) as server:
+        code = main([
+            str(input_path), "--tools",
+            str(tools_path), "--model", "claude-3-haiku-20240307",
+            "--output",
+            str(output_path), "--anthropic-api-key", "test",
+            "--anthropic-base-url", server.base_url
+        ])
+    assert code == 1
+    results = {
+        r["id"]: r
+        for r in map(json.loads,
+                     output_path.read_text().splitlines())
+    }
+    assert results["c0"]["output"]["name"] == "AddTodo"
+    assert results["c2"]["output"]["name"] == "AddTodo"
+    assert results["2"]["error"] == results["4"]["error"] == "Malformed input line"
+
+
+def test_eta_counts_failures():
+    progress = Progress(total=4, skipped=1)
+    progress.done, progress.failed = 2, 1
+    assert "ETA 0s" in progress.line()
+
+
+def test_cli_warnings_are_printed(tmp_path):
+    tools_path = tmp_path / "tools.json"
+    tools_path.write_text(json.dumps(functions))
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text("not json\n")
+    result = subprocess.run([
+        sys.executable, "-c",
+        "import sys; from claudetools.cli import main; sys.exit(main())",
+        str(input_path), "--tools",
+        str(tools_path), "--model", "claude-3-haiku-20240307", "--output",
+        str(tmp_path / "output.jsonl"), "--anthropic-api-key", "test"
+    ],
+                            capture_output=True,
+                            text=True)
+    assert result.returncode == 1
+    assert "claudetools.cli - WARNING - Line 1 is not valid JSON" in result.stderr
@@ -0,0 +1,62 @@
+import asyncio
+from tests.conftest import GOOD, functions, make_tool, user_messages
+
+MODEL = "claude-3-haiku-20240307"
+
+
+def make_coalescing_tool():
+    return make_tool({MODEL: GOOD}, delay=0.05, coalesce=True)
+
+
+def test_identical_requests_share_one_call():
+    tool = make_coalescing_tool()
+
+    async def main():
+        other = [{"role": "user", "content": "Something else"}]
+        return await asyncio.gather(
+            *[tool(MODEL, user_messages, functions) for _ in range(20)],
+            tool(MODEL, other, functions),
+            tool(MODEL, user_messages, functions, temperature=0.0))
+
+    outputs = asyncio.run(main())
+    assert len(tool.complete.calls) == 3
+    assert tool.coalesced_calls == 19
+    assert all(o == {"name": "AddTodo", "parameters": {"text": "laundary"}}
+               for o in outputs)
+    # Callers don't share mutable results
+    assert outputs[0] is not outputs[1]
+
+
+def test_leader_cancellation_keeps_followers_running():
+    tool = make_coalescing_tool()
+
+    async def main():
+        leader = asyncio.ensure_future(tool(MODEL, user_messages, functions))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(
+            tool(MODEL, user_messages, functions))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main())["name"] == "AddTodo"
+    assert len(tool.complete.calls) == 1 and tool.complete.cancelled == 0
+
+
+def test_call_is_cancelled_when_every_caller_leaves():
+    tool = make_coalescing_tool()
+
+    async def main():
+        callers = [
+            asyncio.ensure_future(tool(MODEL, user_messages, functions))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert tool.complete.cancelled == 1
+    assert tool.singleflight.in_flight() == 0
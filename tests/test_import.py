@@ -0,0 +1,43 @@
+import sys
+import subprocess
+
+CHECK = """
+import sys
+import logging
+import claudetools.tools.tool
+import claudetools.agent.agent
+deferred = [m for m in sys.modules
+            if m.split(".")[0] in ("anthropic", "boto3", "botocore", "dotenv")
+            or m.startswith("xml.etree")]
+assert not deferred, deferred
+assert not logging.getLogger().handlers
+
+import asyncio
+from types import SimpleNamespace
+from claudetools.tools.tool import AsyncTool
+
+OUTPUT = ('<singlefunction><functioncall> {"name": "f", "parameters": {}} '
+          '</functioncall></singlefunction>')
+
+
+async def create(**kwargs):
+    return SimpleNamespace(content=[SimpleNamespace(text=OUTPUT)])
+
+
+tool = AsyncTool(anthropic_api_key="test")
+tool.complete.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+asyncio.run(tool("model", [{"role": "user", "content": "hi"}],
+                 [{"name": "f", "description": "f", "parameters": {}}]))
+# Logging from a call must not configure the root logger either
+assert not logging.getLogger().handlers, logging.getLogger().handlers
+"""
+
+
+def test_import_and_calls_are_lazy_and_side_effect_free():
+    subprocess.run([sys.executable, "-c", CHECK], check=True)
+
+
+def test_client_is_imported_on_construction():
+    from claudetools.tools.tool import AsyncTool
+    tool = AsyncTool(anthropic_api_key="test")
+    assert type(tool.complete.client).__name__ == "AsyncAnthropic"
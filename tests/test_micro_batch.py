@@ -0,0 +1,136 @@
+import re
+import json
+import asyncio
+from tests.conftest import functions, make_tool
+
+MODEL = "claude-3-haiku-20240307"
+INPUT_PATTERN = re.compile(r'<input index="(\d+)">\n(.*?)\n</input>', re.DOTALL)
+
+
+def answer(model, messages, system, **kwargs):
+    """Answers every batched input, breaking the ones containing 'bad'."""
+    content = messages[0]["content"]
+    inputs = INPUT_PATTERN.findall(content)
+    if not inputs:
+        text = content.replace("bad", "fixed")
+        call = {"name": "AddTodo", "parameters": {"text": text}}
+        return f"<singlefunction><functioncall> {json.dumps(call)} </functioncall></singlefunction>"
+    calls = []
+    for index, text in inputs:
+        key = "todo" if "bad" in text else "text"
+        calls.append({
+            "index": int(index),
+            "name": "AddTodo",
+            "parameters": [text] if "list" in text else {
+                key: text
+            }
+        })
+    body = "\n".join(f"<functioncall> {json.dumps(c)} </functioncall>"
+                     for c in calls)
+    return f"<multiplefunctions>\n{body}\n</multiplefunctions>"
+
+
+def make_batching_tool(size=4):
+    return make_tool(answer,
+                     delay=0.01,
+                     micro_batch_size=size,
+                     micro_batch_wait=0.05)
+
+
+def ask(tool, text, **kwargs):
+    return tool(MODEL, [{
+        "role": "user",
+        "content": text
+    }],
+                functions,
+                max_tokens=100,
+                **kwargs)
+
+
+def test_inputs_share_one_call_and_split_by_index():
+    tool = make_batching_tool()
+
+    async def main():
+        return await asyncio.gather(*[ask(tool, f"todo {i}") for i in range(4)])
+
+    outputs = asyncio.run(main())
+    assert [o["parameters"]["text"] for o in outputs] == [
+        f"todo {i}" for i in range(4)
+    ]
+    assert len(tool.complete.calls) == 1
+    model, messages, system, kwargs = tool.complete.calls[0]
+    assert system.count("'name': 'AddTodo'") == 1
+    assert kwargs["max_tokens"] == 400
+    assert tool.batcher.stats == {"batches": 1, "items": 4, "fallbacks": 0}
+
+
+def test_invalid_items_are_reissued_individually():
+    tool = make_batching_tool(size=8)
+
+    async def main():
+        return await asyncio.gather(ask(tool, "todo 0"), ask(tool, "bad 1"),
+                                    ask(tool, "todo 2"))
+
+    outputs = asyncio.run(main())
+    assert [o["parameters"]["text"] for o in outputs] == [
+        "todo 0", "fixed 1", "todo 2"
+    ]
+    # One batch after the wait window plus one individual retry
+    assert len(tool.complete.calls) == 2
+    assert tool.batcher.stats["fallbacks"] == 1
+
+
+def test_different_arguments_are_not_batched_together():
+    tool = make_batching_tool()
+
+    async def main():
+        return await asyncio.gather(ask(tool, "todo 0"),
+                                    ask(tool, "todo 1", temperature=0.0))
+
+    outputs = asyncio.run(main())
+    assert [o["parameters"]["text"] for o in outputs] == ["todo 0", "todo 1"]
+    assert tool.batcher.stats["batches"] == 0
+
+
+def test_max_tokens_is_never_lowered():
+    tool = make_batching_tool()
+
+    async def main():
+        return await asyncio.gather(*[
+            tool(MODEL, [{
+                "role": "user",
+                "content": f"todo {i}"
+            }],
+                 functions,
+                 max_tokens=8000) for i in range(2)
+        ])
+
+    asyncio.run(main())
+    assert tool.complete.calls[0][3]["max_tokens"] == 8000
+
+
+def test_broken_batch_never_leaves_callers_waiting():
+    tool = make_batching_tool()
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(ask(tool, "list 0"), ask(tool, "todo 1")), 2)
+
+    outputs = asyncio.run(main())
+    assert [o["parameters"]["text"] for o in outputs] == ["list 0", "todo 1"]
+    assert tool.batcher.stats["fallbacks"] == 1
+
+    def broken(*args):
+        raise RuntimeError("repair failed")
+
+    tool = make_batching_tool()
+    tool._repair_parameters = broken
+
+    async def failing():
+        return await asyncio.wait_for(
+            asyncio.gather(ask(tool, "todo 0"),
+                           ask(tool, "todo 1"),
+                           return_exceptions=True), 2)
+
+    errors = asyncio.run(failing())
+    assert [str(e) for e in errors] == ["repair failed", "repair failed"]
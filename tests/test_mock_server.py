@@ -0,0 +1,36 @@
+import asyncio
+from benchmarks.mock_server import MockConfig, MockServer
+from claudetools.tools.tool import AsyncTool
+from claudetools.agent.agent import AsyncAgent
+from tests.conftest import functions, user_messages
+
+
+def test_async_tool_against_mock_server():
+    with MockServer(MockConfig(latency="constant", latency_ms=1)) as server:
+        tool = AsyncTool(anthropic_api_key="test",
+                         anthropic_base_url=server.base_url)
+        output = asyncio.run(
+            tool("claude-3-haiku-20240307",
+                 user_messages,
+                 functions,
+                 multiple_tools=True,
+                 max_tokens=100))
+        assert [call["name"] for call in output] == ["AddTodo", "AddTodo"]
+        assert server.state.requests == 1
+
+
+def test_agent_streams_from_mock_server():
+    final = "All done."
+    with MockServer(MockConfig(latency="constant", latency_ms=1)) as server:
+        tool = AsyncTool(anthropic_api_key="test",
+                         anthropic_base_url=server.base_url)
+        agent = AsyncAgent(tool, {"AddTodo": lambda text: "added"},
+                           max_steps=1)
+        result = asyncio.run(
+            agent.run("claude-3-haiku-20240307",
+                      user_messages,
+                      functions,
+                      max_tokens=100))
+        assert result.stop_reason == "max_steps"
+        assert [r.output for r in result.steps[0].results] == ["added"] * 2
+        assert result.output_tokens > 0
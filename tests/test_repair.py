@@ -0,0 +1,149 @@
+import asyncio
+from claudetools.extract.repair import normalizeJson, repairParameters
+from claudetools.extract.single import extractSingleFunction
+from tests.conftest import make_tool
+
+schema = {
+    "$defs": {
+        "Step": {
+            "properties": {
+                "id": {
+                    "type": "integer"
+                },
+                "done": {
+                    "type": "boolean"
+                }
+            },
+            "type": "object"
+        }
+    },
+    "properties": {
+        "count": {
+            "type": "integer"
+        },
+        "ratio": {
+            "type": "number"
+        },
+        "tags": {
+            "type": "array",
+            "items": {
+                "type": "string"
+            }
+        },
+        "color": {
+            "enum": ["red", "green"],
+            "type": "string"
+        },
+        "steps": {
+            "type": "array",
+            "items": {
+                "$ref": "#/$defs/Step"
+            }
+        },
+        "note": {
+            "anyOf": [{
+                "type": "string"
+            }, {
+                "type": "null"
+            }]
+        }
+    },
+    "type": "object"
+}
+
+
+def test_normalize_json():
+    text = "{'name': 'AddTodo', 'parameters': {'text': \"it's\", 'ok': True, 'tags': ['a', 'b',],},}"
+    assert normalizeJson(text) == (
+        '{"name": "AddTodo", "parameters": {"text": "it\'s", "ok": true, '
+        '"tags": ["a", "b"]}}')
+
+
+def test_repair_parameters():
+    parameters, repairs = repairParameters(
+        {
+            "count": "5",
+            "ratio": "0.5",
+            "tags": "urgent",
+            "color": "Red",
+            "steps": [{
+                "id": 1.0,
+                "done": "TRUE"
+            }],
+            "note": 3
+        }, schema, "plan")
+    assert parameters == {
+        "count": 5,
+        "ratio": 0.5,
+        "tags": ["urgent"],
+        "color": "red",
+        "steps": [{
+            "id": 1,
+            "done": True
+        }],
+        "note": "3"
+    }
+    assert len(repairs) == 7
+    assert 'plan.count: "5" -> 5 (integer)' in repairs
+
+
+def test_only_item_scalars_are_wrapped():
+    array_schema = {
+        "properties": {
+            "ids": {
+                "type": "array",
+                "items": {
+                    "type": "integer"
+                }
+            },
+            "tags": {
+                "type": "array",
+                "items": {
+                    "type": "string"
+                }
+            }
+        },
+        "type": "object"
+    }
+    for value in (None, {"a": 1}, "x"):
+        parameters, repairs = repairParameters({"ids": value}, array_schema)
+        assert parameters == {"ids": value} and repairs == []
+    parameters, _ = repairParameters({"ids": "5", "tags": None}, array_schema)
+    assert parameters == {"ids": [5], "tags": None}
+
+
+def test_unsafe_values_are_left_alone():
+    parameters, repairs = repairParameters(
+        {
+            "count": "five",
+            "ratio": 1.5,
+            "color": "blue"
+        }, schema)
+    assert parameters == {"count": "five", "ratio": 1.5, "color": "blue"}
+    assert repairs == []
+
+
+def test_malformed_json_is_recovered():
+    output = """<singlefunction>
+    <functioncall> {"name": "AddTodo", "parameters": {"text": "laundary",},} </functioncall>
+</singlefunction>"""
+    assert extractSingleFunction(output) == [{
+        "name": "AddTodo",
+        "parameters": {
+            "text": "laundary"
+        }
+    }]
+
+
+def test_tool_call_repairs_instead_of_retrying():
+    tools = [{"name": "plan", "description": "Plan.", "parameters": schema}]
+    tool = make_tool([
+        """<singlefunction><functioncall> {'name': 'plan', 'parameters': {'count': '5', 'color': 'GREEN'}} </functioncall></singlefunction>"""
+    ])
+    output = asyncio.run(
+        tool("claude-3-haiku-20240307", [{
+            "role": "user",
+            "content": "Plan five green things"
+        }], tools))
+    assert output["parameters"] == {"count": 5, "color": "green"}
+    assert len(tool.complete.calls) == 1
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+from benchmarks.mock_server import MockConfig, MockServer
+from claudetools.completion.replay import RecordReplay
+from claudetools.tools.tool import Tool, AsyncTool
+from claudetools.agent.agent import AsyncAgent
+from tests.conftest import functions, user_messages
+
+MODEL = "claude-3-haiku-20240307"
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    with MockServer(MockConfig(latency="constant", latency_ms=50)) as server:
+        tool = Tool(anthropic_api_key="test",
+                    anthropic_base_url=server.base_url,
+                    record_replay=RecordReplay(path, mode="record"))
+        recorded = tool(MODEL, user_messages, functions, max_tokens=100)
+
+    # No server and no credentials are needed to replay
+    replayed = Tool(record_replay=RecordReplay(path))(MODEL,
+                                                     user_messages,
+                                                     functions,
+                                                     max_tokens=100)
+    assert replayed == recorded
+
+    replay = RecordReplay(path, replay_latency=True, speed=10)
+    tool = AsyncTool(record_replay=replay)
+    start = time.perf_counter()
+    output = asyncio.run(
+        tool(MODEL, user_messages, functions, max_tokens=100))
+    elapsed = time.perf_counter() - start
+    assert output == recorded
+    assert 0.004 <= elapsed < 0.05
+
+
+def test_replay_miss_raises(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    path.write_text("")
+    tool = Tool(record_replay=RecordReplay(str(path)))
+    with pytest.raises(ValueError):
+        tool(MODEL, user_messages, functions, max_tokens=100)
+
+
+def test_streaming_agent_records_and_replays(tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    calls = []
+
+    def run(tool):
+        agent = AsyncAgent(tool, {"AddTodo": lambda text: calls.append(text)},
+                           max_steps=2)
+        return asyncio.run(
+            agent.run(MODEL, user_messages, functions, max_tokens=100))
+
+    with MockServer(MockConfig(latency="constant", latency_ms=5)) as server:
+        recorded = run(
+            AsyncTool(anthropic_api_key="test",
+                      anthropic_base_url=server.base_url,
+                      record_replay=RecordReplay(path, mode="record")))
+    replayed = run(AsyncTool(record_replay=RecordReplay(path)))
+    assert replayed.output == recorded.output
+    assert [s.output for s in replayed.steps] == [
+        s.output for s in recorded.steps
+    ]
+    assert replayed.input_tokens == recorded.input_tokens
+    assert len(calls) == 2 * sum(len(s.results) for s in recorded.steps)
@@ -0,0 +1,160 @@
+import asyncio
+import time
+import threading
+from datetime import datetime
+from claudetools.cache.result_cache import ResultCache, _MISSING
+from claudetools.concurrency.singleflight import SingleFlight
+
+schema = {
+    "name": "getWeather",
+    "description": "Get the weather of a city.",
+    "parameters": {
+        "properties": {
+            "city": {
+                "type": "string"
+            },
+            "unit": {
+                "type": "string",
+                "default": "celsius"
+            }
+        },
+        "required": ["city"],
+        "type": "object"
+    }
+}
+
+
+def test_key_is_canonical():
+    cache = ResultCache()
+    assert cache.key("getWeather", {
+        "city": "NY",
+        "unit": "celsius"
+    }, schema) == cache.key("getWeather", {"city": "NY"}, schema)
+    assert cache.key("getWeather", {"a": 1, "b": 2}) == cache.key(
+        "getWeather", {"b": 2, "a": 1})
+    assert cache.key("getWeather", {"city": "NY"}) != cache.key(
+        "getWeather", {"city": "LA"})
+
+
+def test_concurrent_identical_calls_run_once():
+    cache = ResultCache()
+    runs = []
+
+    async def handler():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"temp": 21}
+
+    async def main():
+        results = await asyncio.gather(*[
+            cache.call("getWeather", {"city": "NY"}, handler)
+            for _ in range(10)
+        ])
+        again = await cache.call("getWeather", {"city": "NY"}, handler)
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert len(runs) == 1
+    assert all(r == {"temp": 21} for r in results) and again == {"temp": 21}
+    stats = cache.stats.to_dict()
+    assert stats["misses"] == 1 and stats["coalesced"] == 9
+    assert stats["hits"] == 1
+
+
+def test_lru_ttl_and_sqlite(tmp_path):
+    cache = ResultCache(max_size=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.stats.evictions == 1
+    assert "a" not in cache.entries and cache.get("c") == 3
+    time.sleep(0.06)
+    cache.get("c")
+    assert "c" not in cache.entries
+
+    path = str(tmp_path / "results.db")
+    first = ResultCache(sqlite_path=path)
+    first.set("key", {"temp": 21})
+    second = ResultCache(sqlite_path=path)
+    assert second.get("key") == {"temp": 21}
+    first.close()
+    second.close()
+
+
+def test_singleflight_survives_leader_cancellation():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+    assert flight.saved == 1
+
+
+def test_callers_get_copies(tmp_path):
+    cache = ResultCache(sqlite_path=str(tmp_path / "cache.db"))
+
+    async def handler():
+        return {"items": [1]}
+
+    async def run():
+        first = await cache.call("list", {}, handler)
+        first["items"].append(2)
+        return await cache.call("list", {}, handler)
+
+    assert asyncio.run(run()) == {"items": [1]}
+    cache.close()
+
+
+def test_only_json_results_are_persisted(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(sqlite_path=path)
+    cache.set("tuple", (1, 2))
+    cache.set("time", {"at": datetime(2024, 1, 1)})
+    cache.set("plain", {"a": [1, 2]})
+    assert cache.get("tuple") == (1, 2)
+    cache.close()
+
+    reopened = ResultCache(sqlite_path=path)
+    assert reopened.get("plain") == {"a": [1, 2]}
+    assert reopened.get("tuple") is _MISSING
+    assert reopened.get("time") is _MISSING
+    reopened.close()
+
+
+def test_sqlite_runs_off_the_event_loop(tmp_path):
+    cache = ResultCache(sqlite_path=str(tmp_path / "cache.db"))
+    threads = []
+
+    def traced(method):
+
+        def wrapper(*args):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        return wrapper
+
+    cache._load = traced(cache._load)
+    cache._persist = traced(cache._persist)
+
+    async def handler():
+        return {"temp": 20}
+
+    async def run():
+        await cache.call("getWeather", {"city": "NY"}, handler)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 2 and loop_thread not in threads
+    cache.entries.clear()
+    assert cache.get(cache.key("getWeather", {"city": "NY"})) == {"temp": 20}
+    cache.close()
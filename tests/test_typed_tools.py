@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from pydantic import BaseModel, Field
+from claudetools.tools.typed import model_tool_spec
+from tests.conftest import make_tool, user_messages
+
+
+class AddTodo(BaseModel):
+    """Add a TODO with text to remember."""
+    text: str = Field(..., description="Text to add for the TODO to remember.")
+    priority: int = 1
+
+
+class MarkCompleted(BaseModel):
+    """Get text of the todo mark it complete"""
+    text: str = Field(..., description="Text of the completed TODO.")
+
+
+def test_model_tool_spec_is_cached():
+    spec = model_tool_spec(AddTodo)
+    assert spec is model_tool_spec(AddTodo)
+    assert spec["name"] == "AddTodo"
+    assert spec["description"] == "Add a TODO with text to remember."
+
+
+def test_model_tools_return_instances():
+    tool = make_tool([
+        """<multiplefunctions>
+    <functioncall> {"name": "AddTodo", "parameters": {"text": "laundary", "priority": 2}} </functioncall>
+    <functioncall> {"name": "MarkCompleted", "parameters": {"text": "lunch"}} </functioncall>
+</multiplefunctions>"""
+    ])
+    output = asyncio.run(
+        tool("claude-3-haiku-20240307",
+             user_messages, [AddTodo, MarkCompleted],
+             multiple_tools=True))
+    assert output[0]["parameters"] == AddTodo(text="laundary", priority=2)
+    assert isinstance(output[1]["parameters"], MarkCompleted)
+
+
+def test_validation_errors_are_retried():
+    tool = make_tool([
+        """<singlefunction><functioncall> {"name": "AddTodo", "parameters": {"priority": "high"}} </functioncall></singlefunction>""",
+        """<singlefunction><functioncall> {"name": "AddTodo", "parameters": {"text": "laundary"}} </functioncall></singlefunction>"""
+    ])
+    output = asyncio.run(
+        tool("claude-3-haiku-20240307", user_messages, [AddTodo]))
+    assert output["parameters"].text == "laundary"
+    assert "parameters.text: Field required" in tool.complete.systems[1]
+
+
+def test_mixed_tools_and_unknown_function():
+    dict_tool = {
+        "name": "ReOpen",
+        "description": "Get text of the todo reopen it.",
+        "parameters": {
+            "properties": {
+                "text": {
+                    "type": "string"
+                }
+            },
+            "required": ["text"],
+            "type": "object"
+        }
+    }
+    tool = make_tool([
+        """<singlefunction><functioncall> {"name": "Unknown", "parameters": {}} </functioncall></singlefunction>"""
+    ])
+    with pytest.raises(ValueError):
+        asyncio.run(
+            tool("claude-3-haiku-20240307",
+                 user_messages, [AddTodo, dict_tool],
+                 max_retries=1))
+
+    tool = make_tool([
+        """<singlefunction><functioncall> {"name": "ReOpen", "parameters": {"text": "lunch"}} </functioncall></singlefunction>"""
+    ])
+    output = asyncio.run(
+        tool("claude-3-haiku-20240307", user_messages, [AddTodo, dict_tool]))
+    assert output == {"name": "ReOpen", "parameters": {"text": "lunch"}}